@@ -67,10 +67,24 @@ async function fetchWithTimeout(url, options = {}, timeoutMs = FETCH_TIMEOUT_MS)
   }
 }
 
+// Match lists carry each match's start_ts (epoch seconds) and the server clock in X-Server-Time;
+// countdowns run against serverNow() so a wrong device clock doesn't open or close bidding early.
+let serverClockOffsetMs = 0;
+
+function noteServerTime(res) {
+  const serverMs = Number(res.headers.get('X-Server-Time'));
+  if (serverMs) serverClockOffsetMs = serverMs - Date.now();
+}
+
+export function serverNow() {
+  return Date.now() + serverClockOffsetMs;
+}
+
 export async function getMatches(series) {
   const url = series ? `${API_BASE}/matches/?series=${encodeURIComponent(series)}` : `${API_BASE}/matches/`;
   const res = await fetchWithTimeout(url, { headers: getHeaders() });
   if (!res.ok) throw new Error('Failed to fetch matches');
+  noteServerTime(res);
   const data = await res.json();
   return Array.isArray(data) ? data : [];
 }
@@ -78,6 +92,7 @@ export async function getMatches(series) {
 export async function getTodayMatches() {
   const res = await fetch(`${API_BASE}/matches/today`, { headers: getHeaders() });
   if (!res.ok) throw new Error('Failed to fetch matches');
+  noteServerTime(res);
   return res.json();
 }
 
@@ -93,6 +108,14 @@ export async function getMe() {
   return res.json();
 }
 
+// Home-screen state in one request: { user, dashboard_stats, bid_stats, today_matches, teams }
+export async function getBootstrap() {
+  const res = await fetchWithTimeout(`${API_BASE}/bootstrap`, { headers: getHeaders() });
+  if (!res.ok) throw new Error('Failed to fetch home screen');
+  noteServerTime(res);
+  return res.json();
+}
+
 export async function getDashboardStats() {
   const res = await fetch(`${API_BASE}/users/dashboard-stats`, { headers: getHeaders() });
   if (!res.ok) throw new Error('Failed to fetch dashboard stats');
@@ -112,6 +135,62 @@ export async function placeBid(matchId, selectedTeamId) {
   return res.json();
 }
 
+const MAX_MATCH_IDS = 200;  // per /bids/for-matches request
+
+async function fetchMyBidsFor(query) {
+  const res = await fetch(`${API_BASE}/bids/for-matches?${query}`, { headers: getHeaders() });
+  if (!res.ok) throw new Error('Failed to fetch bids');
+  return res.json();
+}
+
+// The current user's bids for a series, or for the given match ids (a few requests of up to 200 ids).
+export async function getMyBidsForMatches({ series, matchIds = [] } = {}) {
+  if (series) return fetchMyBidsFor(`series=${encodeURIComponent(series)}`);
+  const chunks = [];
+  for (let i = 0; i < matchIds.length; i += MAX_MATCH_IDS) chunks.push(matchIds.slice(i, i + MAX_MATCH_IDS));
+  const pages = await Promise.all(chunks.map((ids) => fetchMyBidsFor(`match_ids=${ids.join(',')}`)));
+  return pages.flat();
+}
+
+const STREAM_RETRY_MS = 5000;
+
+// Live match events (server events.py): calls handlers[eventName](data). The stream is opened with a
+// short-lived stream token, never the login token (query strings end up in access logs), and every
+// reconnect fetches a new one. Returns a function that closes the stream.
+export function openMatchEvents(handlers) {
+  let source = null;
+  let retry = null;
+  let closed = false;
+  const reconnect = () => {
+    if (!closed) retry = setTimeout(connect, STREAM_RETRY_MS);
+  };
+  async function connect() {
+    try {
+      const res = await fetch(`${API_BASE}/auth/stream-token`, { method: 'POST', headers: getHeaders() });
+      if (res.status === 401) return;  // Logged out
+      if (!res.ok) throw new Error('Failed to open live updates');
+      const { access_token: token } = await res.json();
+      if (closed) return;
+      source = new EventSource(`${API_BASE}/matches/stream?access_token=${encodeURIComponent(token)}`);
+      Object.entries(handlers).forEach(([event, fn]) => {
+        source.addEventListener(event, (e) => fn(JSON.parse(e.data)));
+      });
+      source.onerror = () => {
+        source.close();  // Don't let the browser retry with the expired token
+        reconnect();
+      };
+    } catch {
+      reconnect();
+    }
+  }
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    source?.close();
+  };
+}
+
 export async function getMyBidForMatch(matchId) {
   const res = await fetch(`${API_BASE}/bids/for-match/${matchId}`, { headers: getHeaders() });
   if (!res.ok) throw new Error('Failed to fetch bid');
@@ -158,7 +237,15 @@ export async function adminGetMatchResults() {
   return res.json();
 }
 
-export async function adminConfirmMatchResult(matchId, winnerTeamId) {
+export async function adminGetSettlementJob(jobId) {
+  const res = await fetch(`${API_BASE}/users/admin/settlement-jobs/${jobId}`, { headers: getHeaders() });
+  if (!res.ok) throw new Error('Failed to fetch settlement status');
+  return res.json();
+}
+
+// Confirming queues a settlement job on the server; wait for it to finish (or fail).
+// Posting the same result again returns the same job, so a retry after a timeout is safe.
+export async function adminConfirmMatchResult(matchId, winnerTeamId, { timeoutMs = 60000 } = {}) {
   const res = await fetch(`${API_BASE}/users/admin/match-results/${matchId}/confirm`, {
     method: 'POST',
     headers: getHeaders(),
@@ -168,5 +255,13 @@ export async function adminConfirmMatchResult(matchId, winnerTeamId) {
     const err = await res.json().catch(() => ({}));
     throw new Error(err.detail || 'Failed to confirm result');
   }
-  return res.json();
+  let job = await res.json();
+  const deadline = Date.now() + timeoutMs;
+  while (job.status !== 'done' && job.status !== 'failed') {
+    if (Date.now() > deadline) throw new Error('Settlement is still running. Check again shortly.');
+    await new Promise((resolve) => setTimeout(resolve, 500));
+    job = await adminGetSettlementJob(job.job_id);
+  }
+  if (job.status === 'failed') throw new Error(job.error || 'Settlement failed');
+  return job;
 }
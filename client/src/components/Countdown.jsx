@@ -1,20 +1,23 @@
 import { useState, useEffect } from 'react';
+import { serverNow } from '../api';
 
-export function Countdown({ secondsUntilStart, onExpire }) {
-  const [secs, setSecs] = useState(secondsUntilStart ?? 0);
+const secondsUntil = (startTs) => (startTs == null ? 0 : Math.max(0, Math.floor(startTs - serverNow() / 1000)));
+
+export function Countdown({ startTs, onExpire }) {
+  const [secs, setSecs] = useState(() => secondsUntil(startTs));
 
   useEffect(() => {
-    setSecs(secondsUntilStart ?? 0);
-  }, [secondsUntilStart]);
+    setSecs(secondsUntil(startTs));
+  }, [startTs]);
 
   useEffect(() => {
     if (secs <= 0) {
       onExpire?.();
       return;
     }
-    const t = setInterval(() => setSecs((s) => Math.max(0, s - 1)), 1000);
+    const t = setInterval(() => setSecs(secondsUntil(startTs)), 1000);
     return () => clearInterval(t);
-  }, [secs, onExpire]);
+  }, [secs, startTs, onExpire]);
 
   const h = Math.floor(secs / 3600);
   const m = Math.floor((secs % 3600) / 60);
@@ -4,13 +4,18 @@ import { getTeamFlagUrl } from '../utils/teamFlags';
 import { Countdown } from './Countdown';
 import { BidBreakdownModal } from './BidBreakdownModal';
 
-export function MatchCard({ match, bidStats, onBidPlaced }) {
+// initialBid: the user's bid from the page's bulk fetch (null = no bid); undefined makes the card fetch its own.
+export function MatchCard({ match, bidStats, onBidPlaced, initialBid }) {
   const [myBid, setMyBid] = useState(null);
   const [selectedTeamId, setSelectedTeamId] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
   useEffect(() => {
+    if (initialBid !== undefined) {
+      setMyBid(initialBid);
+      return;
+    }
     getMyBidForMatch(match.id)
       .then((r) => {
         if (r.has_bid && r.bid) {
@@ -21,7 +26,7 @@ export function MatchCard({ match, bidStats, onBidPlaced }) {
         }
       })
       .catch(() => setMyBid(null)); // Backend not available - ignore, use local state only
-  }, [match.id]);
+  }, [match.id, initialBid]);
 
   const handleBid = async (teamId) => {
     setError('');
@@ -130,7 +135,7 @@ export function MatchCard({ match, bidStats, onBidPlaced }) {
           <span className="status bid-placed">Bid placed</span>
         ) : (
           <Countdown
-            secondsUntilStart={match.seconds_until_start}
+            startTs={match.start_ts}
             onExpire={onBidPlaced}
           />
         )}
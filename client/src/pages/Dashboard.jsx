@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import { getDashboardStats, getBidStats, getMatches } from '../api';
+import { getBootstrap } from '../api';
 import { TeamsModal } from '../components/TeamsModal';
 import { TodaySummary } from '../components/TodaySummary';
 import { getSampleMatches } from '../utils/sampleMatches';
@@ -15,11 +15,11 @@ export function Dashboard() {
   const [showTeams, setShowTeams] = useState(false);
 
   useEffect(() => {
-    Promise.all([getDashboardStats(), getBidStats(), getMatches()])
-      .then(([s, b, m]) => {
-        setStats(s);
-        setBidStats(b);
-        setMatches(m?.length > 0 ? m : getSampleMatches());
+    getBootstrap()
+      .then((data) => {
+        setStats(data.dashboard_stats);
+        setBidStats(data.bid_stats);
+        setMatches(data.today_matches);  // TodaySummary only shows today's matches
       })
       .catch(() => {
         setStats({ total_matches: 0, wins: 0, losses: 0, pending: 0 });
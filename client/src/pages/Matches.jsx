@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import { getMatches, getBidStats } from '../api';
+import { getMatches, getBidStats, getMyBidsForMatches, openMatchEvents } from '../api';
 import { MatchCard } from '../components/MatchCard';
 import { TeamsModal } from '../components/TeamsModal';
 import { getSampleMatches } from '../utils/sampleMatches';
@@ -10,6 +10,7 @@ export function Matches() {
   const { user, logout } = useAuth();
   const [matches, setMatches] = useState([]);
   const [bidStats, setBidStats] = useState(null);
+  const [myBids, setMyBids] = useState(null);  // match_id -> bid; null = not loaded, cards fetch their own
   const [loading, setLoading] = useState(true);
   const [series, setSeries] = useState('all');  // all, ipl, worldcup
   const [filter, setFilter] = useState('all');  // all, today
@@ -22,12 +23,27 @@ export function Matches() {
       .catch(() => getSampleMatches(s));
   };
 
+  const fetchMyBids = (query) =>
+    getMyBidsForMatches(query)
+      .then((bids) => Object.fromEntries(bids.map((b) => [b.match_id, b])))
+      .catch(() => null);
+
+  // All series: look up bids for the listed matches; one series: fetch both in parallel
+  const fetchAll = (seriesFilter) => {
+    const matchesReq = fetchMatches(seriesFilter);
+    const bidsReq = seriesFilter === 'all'
+      ? matchesReq.then((m) => fetchMyBids({ matchIds: m.map((match) => match.id) }))
+      : fetchMyBids({ series: seriesFilter });
+    return Promise.all([matchesReq, getBidStats(), bidsReq]);
+  };
+
   useEffect(() => {
     setLoading(true);
-    Promise.all([fetchMatches(series), getBidStats()])
-      .then(([m, s]) => {
+    fetchAll(series)
+      .then(([m, s, b]) => {
         setMatches(m);
         setBidStats(s);
+        setMyBids(b);
       })
       .catch(() => {
         setMatches(getSampleMatches(series === 'all' ? null : series));
@@ -36,13 +52,26 @@ export function Matches() {
       .finally(() => setLoading(false));
   }, [series]);
 
+  // Live updates: re-fetch quietly when a match locks or a result is confirmed
+  useEffect(() => {
+    const reload = () => fetchAll(series)
+      .then(([m, s, b]) => {
+        setMatches(m);
+        setBidStats(s);
+        setMyBids(b);
+      })
+      .catch(() => {});
+    return openMatchEvents({ match_locked: reload, result_confirmed: reload });
+  }, [series]);
+
   const refresh = () => {
     setLoading(true);
     const s = series === 'all' ? null : series;
-    Promise.all([fetchMatches(series), getBidStats()])
-      .then(([m, bidS]) => {
+    fetchAll(series)
+      .then(([m, bidS, b]) => {
         setMatches(m);
         setBidStats(bidS);
+        setMyBids(b);
       })
       .catch(() => {
         setMatches(getSampleMatches(s));
@@ -128,6 +157,7 @@ export function Matches() {
               <MatchCard
                 key={match.id}
                 match={match}
+                initialBid={myBids ? myBids[match.id] ?? null : undefined}
                 bidStats={bidStats}
                 onBidPlaced={refresh}
               />
@@ -22,7 +22,7 @@ export function getSampleMatches(seriesFilter) {
     d.setDate(d.getDate() + m.dayOffset);
     const matchDate = fmt(d);
     const matchDt = new Date(`${matchDate}T${m.match_time}`);
-    const secs = Math.max(0, Math.floor((matchDt - new Date()) / 1000));
+    const startTs = Math.floor(matchDt.getTime() / 1000);
     return {
       id: `${m.series}-${i + 1}`,
       team1: m.team1,
@@ -33,8 +33,8 @@ export function getSampleMatches(seriesFilter) {
       match_type: m.match_type,
       series: m.series || "worldcup",
       status: "upcoming",
-      is_locked: secs <= 0,
-      seconds_until_start: secs > 0 ? secs : null,
+      start_ts: startTs,
+      is_locked: startTs <= Date.now() / 1000,
     };
   });
 }
@@ -0,0 +1,67 @@
+"""Optional async engine/session (ASYNC_DB_ENABLED) for the hot read endpoints in routers/async_reads.py.
+
+Uses asyncpg for PostgreSQL and aiosqlite for SQLite, neither of which is in requirements.txt:
+install the one for your database when enabling this. The sync engine in database.py stays in use
+for writes and admin routes. The async engine is created on first use.
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from . import profiling
+from .config import settings
+from .database import SQLALCHEMY_DATABASE_URL, is_postgres
+
+_ASYNC_DRIVERS = {"postgresql": ("asyncpg", "asyncpg"), "sqlite": ("aiosqlite", "aiosqlite")}
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def _async_url_and_args():
+    url = make_url(SQLALCHEMY_DATABASE_URL)
+    backend = "postgresql" if is_postgres else "sqlite"
+    driver, module = _ASYNC_DRIVERS[backend]
+    try:
+        __import__(module)
+    except ImportError:
+        raise RuntimeError(f"ASYNC_DB_ENABLED needs the '{module}' package: pip install {module}")
+    connect_args = {}
+    if is_postgres:
+        # libpq-style options (Neon URLs carry sslmode/channel_binding) are not asyncpg arguments
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        url = url.set(query=query)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = "require"
+    return url.set(drivername=f"{backend}+{driver}"), connect_args
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        url, connect_args = _async_url_and_args()
+        kwargs = {"connect_args": connect_args}
+        if is_postgres:
+            kwargs.update(
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+                pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+            )
+        _async_engine = create_async_engine(url, **kwargs)
+        profiling.install(_async_engine.sync_engine)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+    return _async_engine
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -1,13 +1,20 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 import bcrypt
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .config import settings
 from .database import get_db
+from .async_database import get_async_db
+from .hashing import HashingPoolBusy, hashing_pool
 from .models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -18,7 +25,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode("utf-8")
+
+
+async def _run_hashing(fn, *args):
+    try:
+        return await hashing_pool.submit(fn, *args)
+    except HashingPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy. Please try again in a moment.",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bounded hashing pool. Raises 503 when the pool is saturated."""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the bounded hashing pool. Raises 503 when the pool is saturated."""
+    return await _run_hashing(get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -28,30 +56,184 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def decode_token(token: str) -> Optional[dict]:
+def decode_token(token: str, audience: Optional[str] = None) -> Optional[dict]:
+    """Claims of a valid token, or None. Tokens with an audience (stream tokens) only decode when
+    that audience is asked for, so they can't be used as login tokens and vice versa."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM], audience=audience)
     except JWTError:
         return None
+    if audience is not None and payload.get("aud") != audience:
+        return None
+    return payload
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+STREAM_AUDIENCE = "stream"
+
+
+def create_stream_token(user_id: int) -> str:
+    """Short-lived token that only opens GET /matches/stream. EventSource can't send headers, so it goes
+    in the query string, which proxies and access logs record; the login token must never go there."""
+    return create_access_token(
+        {"sub": str(user_id), "aud": STREAM_AUDIENCE},
+        timedelta(seconds=settings.STREAM_TOKEN_EXPIRE_SECONDS),
+    )
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What authorization needs about the caller. Load the User row explicitly when more is required."""
+    id: int
+    username: str
+    is_active: bool
+    is_admin: bool
+
+
+class PrincipalCache:
+    """Short-TTL cache of Principals keyed by token (sub, exp), bounded in size (LRU)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[float, Principal]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, principal: Principal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in [k for k, (_, p) in self._entries.items() if p.id == user_id]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_TTL_SECONDS, settings.PRINCIPAL_CACHE_MAX_ENTRIES)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Call after changing a user's is_active/username so cached tokens pick it up immediately."""
+    principal_cache.invalidate_user(user_id)
+
+
+def _principal_from_user(user: User) -> Principal:
+    return Principal(
+        id=user.id,
+        username=user.username,
+        is_active=bool(getattr(user, "is_active", 1)),
+        is_admin=user.username.lower() in settings.admin_usernames_list,
+    )
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _principal_cache_key(token: str) -> tuple:
+    """(sub, exp) of a valid token. Raises 401 otherwise."""
     payload = decode_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
     user_id: str = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return (user_id, payload.get("exp"))
+
+
+def _load_principal(db: Session, user_id: str) -> Optional[Principal]:
     user = db.query(User).filter(User.id == int(user_id)).first()
+    return _principal_from_user(user) if user else None
+
+
+def _active_principal(principal: Principal) -> Principal:
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Your account has been deactivated. Contact admin."
+        )
+    return principal
+
+
+def load_user(db: Session, principal: Principal) -> User:
+    """The User row behind a (possibly cached) principal. 401 if it has been deleted since."""
+    user = db.get(User, principal.id)
     if user is None:
-        raise credentials_exception
+        invalidate_principal(principal.id)
+        raise _credentials_exception()
     return user
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    cache_key = _principal_cache_key(token)
+    principal = principal_cache.get(cache_key)
+    if principal is None:
+        principal = _load_principal(db, cache_key[0])
+        if principal is None:
+            raise _credentials_exception()
+        principal_cache.put(cache_key, principal)
+    return _active_principal(principal)
+
+
+async def get_current_user_from_query(
+    access_token: Optional[str] = Query(None, description="Stream token from POST /auth/stream-token"),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """The user of a stream token in ?access_token= (the browser EventSource API cannot set headers).
+    Login tokens are refused here: see create_stream_token."""
+    payload = decode_token(access_token, audience=STREAM_AUDIENCE) if access_token else None
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
+    principal = _load_principal(db, payload["sub"])
+    if principal is None:
+        raise _credentials_exception()
+    return _active_principal(principal)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """get_current_user for routes on the async DB path (see async_database.py)."""
+    cache_key = _principal_cache_key(token)
+    principal = principal_cache.get(cache_key)
+    if principal is None:
+        principal = await db.run_sync(_load_principal, cache_key[0])
+        if principal is None:
+            raise _credentials_exception()
+        principal_cache.put(cache_key, principal)
+    return _active_principal(principal)
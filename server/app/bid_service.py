@@ -0,0 +1,96 @@
+"""Bid queries shared by routers. Aggregates run in the database, not per-bid in Python."""
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import Bid, Match, MatchType, User
+
+STAGES = tuple(t.value for t in MatchType)
+
+
+def get_stage_usage(db: Session, user_id: int) -> dict[str, int]:
+    """Bids used per stage (league/semi/final) for a user: one grouped join of bids x matches.
+    Missed bids (no team, recorded at lock time) do not use up the limit."""
+    rows = (
+        db.query(Match.match_type, func.count(Bid.id))
+        .join(Match, Match.id == Bid.match_id)
+        .filter(Bid.user_id == user_id, Bid.selected_team_id.isnot(None))
+        .group_by(Match.match_type)
+        .all()
+    )
+    usage = {stage: 0 for stage in STAGES}
+    for match_type, count in rows:
+        usage[match_type] = count
+    return usage
+
+
+def get_team_counts(db: Session, match_id: int) -> dict[int, int]:
+    """Bids per selected team for a match (missed bids excluded): one GROUP BY."""
+    rows = (
+        db.query(Bid.selected_team_id, func.count(Bid.id))
+        .filter(Bid.match_id == match_id, Bid.selected_team_id.isnot(None))
+        .group_by(Bid.selected_team_id)
+        .all()
+    )
+    return {team_id: count for team_id, count in rows}
+
+
+def get_bidders(db: Session, match_id: int, team_id: int, offset: int = 0, limit: int = 50) -> list[tuple[str, str]]:
+    """(username, bid_status) of a team's bidders on a match, in bid order: one indexed join."""
+    return (
+        db.query(User.username, Bid.bid_status)
+        .join(User, User.id == Bid.user_id)
+        .filter(Bid.match_id == match_id, Bid.selected_team_id == team_id)
+        .order_by(Bid.created_at, Bid.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+
+class TeamCountCache:
+    """get_team_counts per match, kept until a bid for that match is written (invalidate) or the TTL
+    passes. The TTL bounds staleness from bids written by other worker processes."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple[float, dict[int, int]]] = {}
+        self._generation = 0  # Bumped by invalidate(); a load that straddles one is not cached
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, match_id: int) -> dict[int, int]:
+        entry = self._entries.get(match_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            self.hits += 1
+            return entry[1]
+        with self._lock:
+            self.misses += 1
+            generation = self._generation
+        counts = get_team_counts(db, match_id)  # Outside the lock (see catalogue.MatchCatalogue)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[match_id] = (time.monotonic(), counts)
+        return counts
+
+    def invalidate(self, *match_ids: int) -> None:
+        with self._lock:
+            self._generation += 1
+            for match_id in match_ids:
+                self._entries.pop(match_id, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+team_counts_cache = TeamCountCache(settings.BID_COUNTS_CACHE_TTL_SECONDS)
@@ -0,0 +1,202 @@
+"""In-process catalogue of matches, teams and results. match_service reads from here instead of the DB.
+
+The fixture list rarely changes, so one snapshot is loaded (3 SELECTs) and shared by every request
+until it is invalidated (result confirmed, matches loaded) or MATCH_CATALOGUE_TTL_SECONDS passes.
+The TTL bounds staleness for rows uploaded to the DB by hand or by another worker process.
+"""
+import asyncio
+import bisect
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session, joinedload
+
+from .config import settings
+from .models import Match, MatchResult, Team
+
+
+@dataclass(frozen=True)
+class CatalogueSnapshot:
+    """Immutable view of the fixture list. Dicts inside are shared: treat them as read-only."""
+    version: int
+    loaded_at: float
+    matches: dict[int, dict]  # match id -> static match fields (no result, no time-dependent fields)
+    ordered_ids: tuple[int, ...]  # ordered by match_date, match_time
+    teams: tuple[dict, ...]
+    results: dict[int, int | None]  # match id -> winner_team_id (None = no result) for confirmed matches
+    start_ts: dict[int, float | None]  # match id -> start as UTC epoch seconds (None = unparseable date/time)
+    lock_schedule: tuple[tuple[float, int], ...]  # (start_ts, match id) ascending
+
+    def locks_after(self, after_ts: float | None = None) -> list[tuple[float, int]]:
+        """(start_ts, match id) of matches starting strictly after after_ts (all if None), ascending."""
+        if after_ts is None:
+            return list(self.lock_schedule)
+        return list(self.lock_schedule[bisect.bisect_right(self.lock_schedule, (after_ts, float("inf"))):])
+
+    def next_lock_time(self, after_ts: float) -> float | None:
+        """Start (epoch seconds) of the first match starting after after_ts, or None."""
+        upcoming = self.lock_schedule[bisect.bisect_right(self.lock_schedule, (after_ts, float("inf"))):]
+        return upcoming[0][0] if upcoming else None
+
+
+def match_tz():
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(settings.MATCH_TIMEZONE)
+    except Exception:
+        return timezone.utc
+
+
+def start_timestamp(match_date: str, match_time: str, tz) -> float | None:
+    """Match date/time (naive, in MATCH_TIMEZONE) as UTC epoch seconds. Parsed once per catalogue load."""
+    try:
+        return datetime.strptime(f"{match_date} {match_time}", "%Y-%m-%d %H:%M").replace(tzinfo=tz).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _team_dict(t: Team) -> dict:
+    return {"id": t.id, "name": t.name, "short_name": t.short_name}
+
+
+def _load_snapshot(db: Session, version: int) -> CatalogueSnapshot:
+    rows = (
+        db.query(Match)
+        .options(joinedload(Match.team1), joinedload(Match.team2))
+        .order_by(Match.match_date, Match.match_time)
+        .all()
+    )
+    matches = {
+        m.id: {
+            "id": m.id,
+            "team1": _team_dict(m.team1),
+            "team2": _team_dict(m.team2),
+            "match_date": m.match_date,
+            "match_time": m.match_time,
+            "venue": m.venue or "",
+            "match_type": m.match_type,
+            "series": m.series or "worldcup",
+            "status": m.status or "upcoming",
+        }
+        for m in rows
+    }
+    teams = tuple(_team_dict(t) for t in db.query(Team).order_by(Team.id).all())
+    results = {r.match_id: r.winner_team_id for r in db.query(MatchResult).all()}
+    tz = match_tz()
+    start_ts = {m.id: start_timestamp(m.match_date, m.match_time, tz) for m in rows}
+    return CatalogueSnapshot(
+        version=version,
+        loaded_at=time.monotonic(),
+        matches=matches,
+        ordered_ids=tuple(m.id for m in rows),
+        teams=teams,
+        results=results,
+        start_ts=start_ts,
+        lock_schedule=tuple(sorted((ts, mid) for mid, ts in start_ts.items() if ts is not None)),
+    )
+
+
+def can_wait() -> bool:
+    """False on an event loop thread (the async DB path runs sync code there via run_sync), where
+    blocking on another thread's load would stall the loop that load may need."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return True
+    return False
+
+
+class MatchCatalogue:
+    """Versioned snapshot cache with hit/miss counters. Thread-safe (sync routes run in a threadpool).
+
+    Loads are single-flight: when the TTL expires one caller reloads while the others keep serving the
+    stale snapshot. With no snapshot at all (first use, or after invalidate()) they wait for that load.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: CatalogueSnapshot | None = None
+        self._version = 0
+        self._generation = 0  # Bumped by invalidate(); a load that straddles one is not cached
+        self._loading: threading.Event | None = None  # Set when the in-flight load finishes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _is_fresh(self, snap: CatalogueSnapshot | None) -> bool:
+        return snap is not None and time.monotonic() - snap.loaded_at < self.ttl_seconds
+
+    def snapshot(self, db: Session) -> CatalogueSnapshot:
+        snap = self._snapshot
+        if self._is_fresh(snap):
+            self.hits += 1
+            return snap
+        while True:
+            with self._lock:
+                snap = self._snapshot
+                if self._is_fresh(snap):
+                    self.hits += 1
+                    return snap
+                loading = self._loading
+                if loading is not None and snap is not None:
+                    self.hits += 1
+                    return snap  # Stale, but another caller is already reloading
+                if loading is None or not can_wait():
+                    # Load here. The DB query runs outside the lock: on the async path it yields to
+                    # the event loop, and a request blocking on a held threading.Lock would deadlock it.
+                    self.misses += 1
+                    self._version += 1  # Every load gets a new version, so TTL reloads also change it
+                    version, generation = self._version, self._generation
+                    if loading is None:
+                        self._loading = loading = threading.Event()
+                    else:
+                        loading = None  # Event-loop caller while another loads: don't block, don't lead
+                    break
+            loading.wait(timeout=30)
+        try:
+            snap = _load_snapshot(db, version)
+            with self._lock:
+                current = self._snapshot
+                # Keep it unless invalidated while loading, or a concurrent load installed a newer one
+                if generation == self._generation and (current is None or current.version < version):
+                    self._snapshot = snap
+        finally:
+            if loading is not None:
+                with self._lock:
+                    if self._loading is loading:
+                        self._loading = None
+                loading.set()
+        return snap
+
+    def peek(self) -> CatalogueSnapshot | None:
+        """The current snapshot if fresh, else None (no DB access; the caller loads via snapshot())."""
+        snap = self._snapshot
+        if self._is_fresh(snap):
+            self.hits += 1
+            return snap
+        return None
+
+    def invalidate(self) -> None:
+        """Drop the current snapshot; the next read reloads from the DB."""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+            self._loading = None  # A load in flight is stale now: the next caller starts a new one
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+catalogue = MatchCatalogue(ttl_seconds=settings.MATCH_CATALOGUE_TTL_SECONDS)
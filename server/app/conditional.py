@@ -0,0 +1,57 @@
+"""Conditional GET helpers: weak ETags from data versions and 304 Not Modified responses.
+
+An ETag must only repeat when the body would be byte-identical. The only time-dependent field in a
+match list is is_locked, so its tag is the catalogue version plus how many matches are locked.
+There is no countdown in the body: matches carry a fixed start_ts and responses an X-Server-Time
+header (set_server_time) that clients count down from, so a list polled all day stays a 304 until
+a match locks or the catalogue changes.
+"""
+import time
+
+from fastapi import Request, Response
+
+from .data_version import BOOT_ID
+
+
+def make_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(p) for p in (BOOT_ID, *parts)) + '"'
+
+
+def match_list_etag(catalogue_version: int, matches: list[dict], *extra) -> str:
+    locked = sum(1 for m in matches if m["is_locked"])
+    return match_list_etag_from_counts(catalogue_version, len(matches), locked, *extra)
+
+
+def match_list_etag_from_counts(catalogue_version: int, count: int, locked: int, *extra) -> str:
+    """match_list_etag for callers that already know how many matches are locked."""
+    return make_etag("m", catalogue_version, *extra, count, locked)
+
+
+def _normalize(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True when If-None-Match matches etag (weak comparison, as RFC 9110 requires for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = _normalize(etag)
+    return any(_normalize(t) == target for t in header.split(","))
+
+
+def set_server_time(response: Response) -> None:
+    """X-Server-Time: server clock in epoch milliseconds, so clients can count down to start_ts."""
+    response.headers["X-Server-Time"] = str(int(time.time() * 1000))
+
+
+def not_modified(etag: str, cache_control: str = "no-cache") -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_etag(response: Response, etag: str, cache_control: str = "no-cache") -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
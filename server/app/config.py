@@ -5,9 +5,40 @@ class Settings(BaseSettings):
     # Database: set DATABASE_URL for PostgreSQL (e.g. Neon), or leave empty for SQLite
     DATABASE_URL: str = ""
 
+    # Connection pool. Neon drops idle connections, so recycle before its idle timeout and pre-ping on checkout.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 300
+    DB_POOL_PRE_PING: bool = True
+
+    # Serve hot reads (/matches, /matches/today, /bids/my, /bids/for-match, leaderboard) on an async engine.
+    # Needs asyncpg (PostgreSQL) or aiosqlite (SQLite) installed.
+    ASYNC_DB_ENABLED: bool = False
+
+    # SQL instrumentation (off by default): per-request query count and DB time in Server-Timing headers and
+    # logs, with a warning for requests running at least SQL_PROFILING_QUERY_WARN statements (0 = never).
+    # SLOW_QUERY_MS > 0 logs statements slower than that, with or without SQL_PROFILING_ENABLED.
+    SQL_PROFILING_ENABLED: bool = False
+    SQL_PROFILING_QUERY_WARN: int = 20
+    SLOW_QUERY_MS: int = 0
+
+    # GET /metrics (Prometheus text format) and per-route latency histograms. /metrics requires
+    # "Authorization: Bearer <METRICS_TOKEN>" and answers 401 while METRICS_TOKEN is empty.
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""
+
+    # SQLite (local) pragmas applied on each connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Stream tokens (POST /auth/stream-token) only open GET /matches/stream; they travel in the query string,
+    # so they expire quickly. An open stream is not cut off when its token expires.
+    STREAM_TOKEN_EXPIRE_SECONDS: int = 60
 
     # CORS: comma-separated origins (e.g. https://your-app.vercel.app,https://your-app.onrender.com)
     CORS_ORIGINS: str = "http://localhost:5173,http://127.0.0.1:5173"
@@ -28,6 +59,49 @@ class Settings(BaseSettings):
     # Timezone for match times (e.g. Asia/Kolkata for India). Match date/time in DB are in this zone.
     MATCH_TIMEZONE: str = "Asia/Kolkata"
 
+    # In-process match catalogue: max age (seconds) before re-reading matches/teams/results from the DB.
+    # Admin writes invalidate it immediately; the TTL covers rows uploaded to the DB by hand.
+    MATCH_CATALOGUE_TTL_SECONDS: int = 300
+
+    # Per-match bid counts (bid-breakdown summary, live counts): dropped on every bid in this process;
+    # the TTL bounds how stale counts from other worker processes can be.
+    BID_COUNTS_CACHE_TTL_SECONDS: int = 10
+
+    # Lock scheduler: at each match start, mark the match live and record missed bids. One worker at a time
+    # holds the DB lease (renewed well within LEASE seconds); upcoming matches are re-read every RELOAD seconds.
+    LOCK_SCHEDULER_ENABLED: bool = True
+    LOCK_SCHEDULER_RELOAD_SECONDS: int = 60
+    LOCK_SCHEDULER_LEASE_SECONDS: int = 30
+
+    # Settlement jobs: confirming a result queues a job run by a worker thread in each process. The worker
+    # also polls every POLL seconds (jobs queued via another process). A running job's heartbeat is
+    # refreshed every STALE / 4 seconds; one whose heartbeat is older than STALE (crash/restart) is run again.
+    SETTLEMENT_JOB_POLL_SECONDS: float = 2.0
+    SETTLEMENT_JOB_STALE_SECONDS: int = 120
+
+    # Authenticated-user cache (keyed by token sub+exp). Deactivation via admin invalidates immediately;
+    # the TTL bounds how long other worker processes keep a stale entry. 0 disables the cache.
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Materialized leaderboard: full rebuild interval (seconds). Writes in this process update it immediately.
+    LEADERBOARD_REFRESH_SECONDS: int = 60
+
+    # Live match events (/matches/stream): per-client buffered events before a slow client is dropped,
+    # keep-alive comment interval, and the reconnect delay suggested to EventSource.
+    SSE_QUEUE_SIZE: int = 100
+    SSE_HEARTBEAT_SECONDS: int = 15
+    SSE_RETRY_MS: int = 5000
+
+    # Password hashing: bcrypt cost factor for new hashes (existing hashes keep theirs), worker threads,
+    # and how many hash/verify calls may be running or queued before login/register return 503.
+    BCRYPT_ROUNDS: int = 12
+    HASH_WORKERS: int = 2
+    HASH_MAX_PENDING: int = 64
+
+    # Bulk import (admin API and import_data.py): rows validated and upserted per transaction.
+    IMPORT_CHUNK_SIZE: int = 500
+
     @property
     def admin_usernames_list(self) -> list[str]:
         return [u.strip().lower() for u in self.ADMIN_USERNAMES.split(",") if u.strip()]
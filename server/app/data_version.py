@@ -0,0 +1,24 @@
+"""Per-process data version counters, bumped by writes and used to derive ETags.
+
+The match list is versioned by the catalogue snapshot itself (match_service.get_catalogue_version).
+Counters here cover data that lives outside the catalogue. Versions are prefixed with a random
+boot id, so a restart or a different worker process never reuses an ETag for different data.
+"""
+import threading
+import uuid
+
+LEADERBOARD = "leaderboard"  # bumped by leaderboard.py whenever the ranked board changes
+
+BOOT_ID = uuid.uuid4().hex[:8]
+_lock = threading.Lock()
+_versions: dict[str, int] = {LEADERBOARD: 0}
+
+
+def bump(*names: str) -> None:
+    with _lock:
+        for name in names:
+            _versions[name] = _versions.get(name, 0) + 1
+
+
+def current(name: str) -> int:
+    return _versions.get(name, 0)
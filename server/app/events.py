@@ -0,0 +1,123 @@
+"""Server-sent events: one in-process broadcaster fanning live match events out to all /matches/stream clients.
+
+Events (SSE `event:` name, JSON `data:`):
+  match_locked      {"match_id"}                             start time reached, bidding closed
+  result_confirmed  {"match_id", "winner_team_id"}           admin settled the match
+  bid_counts        {"match_id", "counts": {team_id: n}}     a bid was placed or changed
+
+Each event is encoded once and the same bytes are queued to every subscriber, so an idle
+connection costs one small queue. Subscribers that fall SSE_QUEUE_SIZE events behind are dropped
+(the browser's EventSource reconnects). publish() is thread-safe and may be called from sync routes.
+
+Streams stay open until the client goes away, and uvicorn only runs lifespan shutdown once
+connections have closed, so deployments start it with --timeout-graceful-shutdown (Procfile).
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from fastapi.concurrency import run_in_threadpool
+
+from .config import settings
+from .database import SessionLocal
+from .match_service import get_lock_times, now_utc
+
+logger = logging.getLogger(__name__)
+
+_CLOSE = b""  # Sentinel queued to a subscriber that is being dropped
+
+
+def encode_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+class Broadcaster:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self.published = 0
+        self.dropped = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Call on the event loop. Returns a queue of encoded events; _CLOSE means stop."""
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        self._subscribers.discard(q)
+
+    def _fanout(self, message: bytes) -> None:
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait(message)
+            except asyncio.QueueFull:
+                self._subscribers.discard(q)
+                self.dropped += 1
+                q.get_nowait()  # Make room for the close sentinel
+                q.put_nowait(_CLOSE)
+
+    def publish(self, event: str, data: dict) -> None:
+        """Queue an event for every subscriber. Safe from any thread; a no-op with no subscribers."""
+        if self._loop is None or not self._subscribers:
+            return
+        self.published += 1
+        self._loop.call_soon_threadsafe(self._fanout, encode_event(event, data))
+
+    async def stream(self):
+        """Async iterator of SSE bytes for one client, with heartbeats. Unsubscribes when closed."""
+        q = self.subscribe()
+        try:
+            yield f"retry: {settings.SSE_RETRY_MS}\n\n".encode("utf-8")
+            while True:
+                try:
+                    message = await asyncio.wait_for(q.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is _CLOSE:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(q)
+
+
+broadcaster = Broadcaster(queue_size=settings.SSE_QUEUE_SIZE)
+
+
+def _lock_times_after(after: datetime) -> list[tuple[datetime, int]]:
+    db = SessionLocal()
+    try:
+        return get_lock_times(db, after)
+    finally:
+        db.close()
+
+
+async def watch_match_locks(max_sleep: float = 60.0) -> None:
+    """Publish match_locked as each match's start time passes. Re-reads the (cached) fixture list
+    at least every max_sleep seconds so newly loaded matches are picked up."""
+    last = now_utc()
+    while True:
+        try:
+            upcoming = await run_in_threadpool(_lock_times_after, last)
+        except Exception:
+            logger.exception("Lock watcher failed to read match start times")
+            upcoming = []
+        now = now_utc()
+        for start, match_id in upcoming:
+            if start > now:
+                break
+            broadcaster.publish("match_locked", {"match_id": match_id})
+        last = now
+        future = [start for start, _ in upcoming if start > now]
+        delay = min((future[0] - now).total_seconds(), max_sleep) if future else max_sleep
+        await asyncio.sleep(max(delay, 0.05))
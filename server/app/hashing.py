@@ -0,0 +1,104 @@
+"""Bounded worker pool for CPU-heavy password hashing (bcrypt), so it never runs on the event loop.
+
+bcrypt releases the GIL while hashing, so HASH_WORKERS threads hash in parallel. At most
+HASH_MAX_PENDING calls may be running or queued; beyond that submit() fails fast with
+HashingPoolBusy instead of letting a login burst queue up unbounded work.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import settings
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the pool already has HASH_MAX_PENDING calls running or queued."""
+
+
+class HashingPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+        self._lock = threading.Lock()
+        self._pending = 0  # running + queued
+        self._running = 0
+        self.peak_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _try_reserve(self) -> bool:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            queued = self._pending - self._running
+            if queued > self.peak_queue_depth:
+                self.peak_queue_depth = queued
+            return True
+
+    def _reserve(self) -> None:
+        if not self._try_reserve():
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolBusy()
+
+    def _call(self, fn, args):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self.completed += 1
+
+    async def submit(self, fn, *args):
+        """Run fn(*args) on the pool and await the result. Raises HashingPoolBusy when full."""
+        self._reserve()
+        try:
+            future = self._executor.submit(self._call, fn, args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return await asyncio.wrap_future(future)
+
+    def map(self, fn, items) -> list:
+        """Blocking fn(item) for each item, for bulk work off the event loop (imports). Keeps at most
+        `workers` of its calls in the pool and waits for room instead of raising HashingPoolBusy,
+        so logins still get a slot and the pool never exceeds HASH_MAX_PENDING."""
+        results = []
+        in_flight: deque = deque()
+        for item in items:
+            while len(in_flight) >= self.workers or not self._try_reserve():
+                if in_flight:
+                    results.append(in_flight.popleft().result())
+                else:
+                    time.sleep(0.01)  # Pool full of other callers' work
+            try:
+                in_flight.append(self._executor.submit(self._call, fn, (item,)))
+            except BaseException:
+                with self._lock:
+                    self._pending -= 1
+                raise
+        results.extend(f.result() for f in in_flight)
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "peak_queue_depth": self.peak_queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+hashing_pool = HashingPool(settings.HASH_WORKERS, settings.HASH_MAX_PENDING)
@@ -0,0 +1,381 @@
+"""Bulk import of teams, match fixtures and users from CSV or NDJSON, in chunks.
+
+Used by the admin import API (POST /users/admin/import/{kind}) and the import_data.py CLI. Records
+are parsed one line at a time, so files stream through in bounded memory. Each chunk is validated
+against in-memory maps (team short names, existing keys fetched with one query per chunk) and
+upserted with bulk INSERT/UPDATE statements in one transaction. Invalid rows are reported with their
+line number and skipped; the rest of the file is still imported. If a chunk's commit fails (e.g. a
+duplicate mobile number), that chunk is retried row by row so only the offending rows are rejected.
+"""
+import csv
+import json
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, text, update, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .auth import get_password_hash
+from .config import settings
+from .database import is_postgres
+from .hashing import hashing_pool
+from .models import Match, MatchStatus, MatchType, Team, User
+
+KINDS = ("teams", "matches", "users")
+FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 1000
+
+_MOBILE_RE = re.compile(r"^[6-9]\d{9}$")
+
+
+class RowError(Exception):
+    pass
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    processed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def add_error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+        }
+
+
+class _LineFeed:
+    """Iterator the CSV reader pulls physical lines from. Unlike a generator it can run dry and be
+    refilled, so one csv.reader spans the whole stream."""
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+class LineParser:
+    """Turns raw lines into (line_no, record | RowError). CSV takes its header from the first record.
+
+    A quoted CSV field may span lines: lines are buffered until the record's quotes balance, then
+    the (single, stream-wide) csv.reader reads the record. Call finish() at end of input.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        self.fmt = fmt
+        self.header: list[str] | None = None
+        self.line_no = 0
+        self._feed = _LineFeed()
+        self._reader = csv.reader(self._feed)
+        self._record_start = 0  # line_no of the first line of a buffered, unfinished CSV record
+        self._quotes = 0
+
+    def parse(self, line: str):
+        """Returns (line_no, record or RowError), or None for blank lines, the CSV header and the
+        non-final lines of a multi-line CSV record."""
+        self.line_no += 1
+        line = line.strip("\r\n")
+        if self.fmt == "ndjson":
+            if not line.strip():
+                return None
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                return self.line_no, RowError(f"invalid JSON: {e}")
+            if not isinstance(record, dict):
+                return self.line_no, RowError("expected a JSON object")
+            return self.line_no, record
+        if not self._feed.lines:
+            if not line.strip():
+                return None
+            self._record_start = self.line_no
+        self._feed.lines.append(line + "\n")
+        self._quotes += line.count('"')
+        if self._quotes % 2:
+            return None  # Inside a quoted field that continues on the next line
+        self._quotes = 0
+        return self._csv_record(next(self._reader))
+
+    def finish(self):
+        """End of input: a CSV record still buffered has an unterminated quoted field."""
+        if self.fmt != "csv" or not self._feed.lines:
+            return None
+        self._feed.lines.clear()
+        self._quotes = 0
+        return self._record_start, RowError("unterminated quoted field")
+
+    def _csv_record(self, values: list[str]):
+        if self.header is None:
+            self.header = [h.strip().lower() for h in values]
+            return None
+        if len(values) != len(self.header):
+            return self._record_start, RowError(f"expected {len(self.header)} columns, got {len(values)}")
+        return self._record_start, {k: v.strip() for k, v in zip(self.header, values) if v.strip() != ""}
+
+
+def _required(record: dict, key: str) -> str:
+    value = record.get(key)
+    if value is None or str(value).strip() == "":
+        raise RowError(f"missing {key}")
+    return str(value).strip()
+
+
+def _optional_int(record: dict, key: str) -> int | None:
+    value = record.get(key)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{key} must be an integer")
+
+
+class Importer:
+    """Upserts one kind of record. Call import_chunk() per chunk of parsed rows, then read .report."""
+
+    def __init__(self, db: Session, kind: str):
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        self.db = db
+        self.kind = kind
+        self.report = ImportReport(kind)
+        self.updated_ids: list[int] = []  # committed updates, for cache invalidation by the caller
+        self._team_ids: dict[str, int] = {}
+        if kind == "matches":
+            self._team_ids = {short.upper(): tid for tid, short in db.query(Team.id, Team.short_name).all()}
+
+    # Validation: record -> column values (raises RowError)
+
+    def _team(self, record: dict) -> dict:
+        row = {"name": _required(record, "name"), "short_name": _required(record, "short_name").upper()}
+        if len(row["short_name"]) > 10:
+            raise RowError("short_name longer than 10 characters")
+        team_id = _optional_int(record, "id")
+        if team_id is not None:
+            row["id"] = team_id
+        return row
+
+    def _match(self, record: dict) -> dict:
+        teams = []
+        for key in ("team1", "team2"):
+            short = _required(record, key).upper()
+            if short not in self._team_ids:
+                raise RowError(f"unknown team {short!r}")
+            teams.append(self._team_ids[short])
+        if teams[0] == teams[1]:
+            raise RowError("team1 and team2 are the same")
+        match_date, match_time = _required(record, "match_date"), _required(record, "match_time")
+        try:
+            datetime.strptime(f"{match_date} {match_time}", "%Y-%m-%d %H:%M")
+        except ValueError:
+            raise RowError("match_date/match_time must be YYYY-MM-DD and HH:MM")
+        match_type = str(record.get("match_type") or MatchType.LEAGUE.value).lower()
+        if match_type not in {t.value for t in MatchType}:
+            raise RowError(f"invalid match_type {match_type!r}")
+        status = str(record.get("status") or MatchStatus.UPCOMING.value).lower()
+        if status not in {s.value for s in MatchStatus}:
+            raise RowError(f"invalid status {status!r}")
+        row = {
+            "team1_id": teams[0],
+            "team2_id": teams[1],
+            "match_date": match_date,
+            "match_time": match_time,
+            "venue": record.get("venue") or None,
+            "match_type": match_type,
+            "series": str(record.get("series") or "worldcup").lower(),
+            "status": status,
+        }
+        match_id = _optional_int(record, "id")
+        if match_id is not None:
+            row["id"] = match_id
+        return row
+
+    def _user(self, record: dict) -> dict:
+        row = {"username": _required(record, "username")}
+        mobile = record.get("mobile_number")
+        if mobile:
+            mobile = re.sub(r"\D", "", str(mobile))
+            if not _MOBILE_RE.match(mobile):
+                raise RowError("mobile_number must be a valid 10-digit Indian mobile number")
+            row["mobile_number"] = mobile
+        if record.get("hashed_password"):
+            row["hashed_password"] = str(record["hashed_password"])
+        elif record.get("password"):
+            if len(str(record["password"])) < 6:
+                raise RowError("password must be at least 6 characters")
+            row["password"] = str(record["password"])
+        if "is_active" in record:
+            row["is_active"] = 0 if str(record["is_active"]).strip().lower() in ("0", "false", "no") else 1
+        return row
+
+    # Upsert
+
+    def _existing(self, rows: list[dict]) -> dict:
+        """Natural key -> primary key for rows in this chunk that already exist (one query)."""
+        if self.kind == "teams":
+            keys = {r["short_name"] for r in rows}
+            found = self.db.query(Team.short_name, Team.id).filter(Team.short_name.in_(keys)).all()
+            return {short: tid for short, tid in found}
+        if self.kind == "users":
+            keys = {r["username"] for r in rows}
+            return dict(self.db.query(User.username, User.id).filter(User.username.in_(keys)).all())
+        by_id = {r["id"] for r in rows if "id" in r}
+        natural = {self._match_key(r) for r in rows if "id" not in r}
+        existing = {}
+        if by_id:
+            existing.update({("id", mid): mid for (mid,) in self.db.query(Match.id).filter(Match.id.in_(by_id)).all()})
+        if natural:
+            cols = (Match.series, Match.match_date, Match.match_time, Match.team1_id, Match.team2_id)
+            for *key, mid in self.db.query(*cols, Match.id).filter(tuple_(*cols).in_(natural)).all():
+                existing[tuple(key)] = mid
+        return existing
+
+    @staticmethod
+    def _match_key(row: dict):
+        if "id" in row:
+            return ("id", row["id"])
+        return (row["series"], row["match_date"], row["match_time"], row["team1_id"], row["team2_id"])
+
+    def _key(self, row: dict):
+        if self.kind == "teams":
+            return row["short_name"]
+        if self.kind == "users":
+            return row["username"]
+        return self._match_key(row)
+
+    def _hash_passwords(self, rows: list[dict]) -> None:
+        pending = [r for r in rows if "password" in r]
+        if not pending:
+            return
+        hashes = hashing_pool.map(get_password_hash, [r.pop("password") for r in pending])
+        for r, h in zip(pending, hashes):
+            r["hashed_password"] = h
+
+    def _write(self, rows: list[dict]) -> tuple[int, list[int]]:
+        model = {"teams": Team, "matches": Match, "users": User}[self.kind]
+        existing = self._existing(rows)
+        inserts, updates = [], []
+        for row in rows:
+            pk = existing.get(self._key(row))
+            if pk is None:
+                if self.kind == "users" and "hashed_password" not in row:
+                    raise RowError("new user needs password or hashed_password")
+                inserts.append(row)
+            else:
+                updates.append({**row, "id": pk})
+        if inserts:
+            self.db.execute(insert(model), inserts)
+            if is_postgres and any("id" in r for r in inserts):
+                self._sync_id_sequence(model)
+        if updates:
+            self.db.execute(update(model), updates)
+        return len(inserts), [r["id"] for r in updates]
+
+    def _sync_id_sequence(self, model) -> None:
+        """Explicit ids do not advance a PostgreSQL SERIAL sequence: move it past max(id) so the next
+        insert without an id does not collide."""
+        table = model.__tablename__
+        max_id = self.db.execute(select(func.max(model.id))).scalar()
+        self.db.execute(
+            text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :max_id)"),
+            {"table": table, "max_id": max_id},
+        )
+
+    def import_chunk(self, parsed: list[tuple[int, object]]) -> None:
+        """Validate and upsert one chunk of (line_no, record | RowError) in a single transaction."""
+        validate = {"teams": self._team, "matches": self._match, "users": self._user}[self.kind]
+        valid: list[tuple[int, dict]] = []
+        seen = {}
+        for line_no, record in parsed:
+            self.report.processed += 1
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                row = validate(record)
+            except RowError as e:
+                self.report.add_error(line_no, str(e))
+                continue
+            key = self._key(row)
+            if key in seen:
+                self.report.add_error(line_no, f"duplicate of line {seen[key]}")
+                continue
+            seen[key] = line_no
+            valid.append((line_no, row))
+        if not valid:
+            return
+        if self.kind == "users":
+            self._hash_passwords([r for _, r in valid])
+        try:
+            inserted, updated = self._write([r for _, r in valid])
+            self.db.commit()
+        except (SQLAlchemyError, RowError):
+            self.db.rollback()
+            self._import_rows_individually(valid)
+            return
+        self._record(inserted, updated)
+
+    def _record(self, inserted: int, updated: list[int]) -> None:
+        self.report.inserted += inserted
+        self.report.updated += len(updated)
+        self.updated_ids.extend(updated)
+
+    def _import_rows_individually(self, valid: list[tuple[int, dict]]) -> None:
+        for line_no, row in valid:
+            try:
+                inserted, updated = self._write([row])
+                self.db.commit()
+            except RowError as e:
+                self.db.rollback()
+                self.report.add_error(line_no, str(e))
+                continue
+            except SQLAlchemyError as e:
+                self.db.rollback()
+                self.report.add_error(line_no, str(getattr(e, "orig", e)).splitlines()[0])
+                continue
+            self._record(inserted, updated)
+
+
+def import_lines(db: Session, kind: str, fmt: str, lines, chunk_size: int | None = None) -> Importer:
+    """Synchronous driver (CLI): parse an iterable of lines and import it chunk by chunk."""
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    parser = LineParser(fmt)
+    importer = Importer(db, kind)
+    chunk = []
+    for line in lines:
+        parsed = parser.parse(line)
+        if parsed is None:
+            continue
+        chunk.append(parsed)
+        if len(chunk) >= chunk_size:
+            importer.import_chunk(chunk)
+            chunk = []
+    parsed = parser.finish()
+    if parsed is not None:
+        chunk.append(parsed)
+    if chunk:
+        importer.import_chunk(chunk)
+    return importer
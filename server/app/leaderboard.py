@@ -0,0 +1,172 @@
+"""Materialized, ranked leaderboard kept in process memory.
+
+Built with one query on first use, then updated incrementally: settlement, bid placement,
+registration and (de)activation call refresh_users / refresh_for_matches, which re-read just the
+affected users and move them to their new position (bisect on the sort key). Reads are slices.
+A full rebuild every LEADERBOARD_REFRESH_SECONDS picks up writes made by other worker processes.
+
+Order: net amount won desc, wins desc, then user id (registration order) for ties.
+Every change bumps data_version.LEADERBOARD, which the endpoint's ETag is derived from.
+"""
+import bisect
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import data_version
+from .catalogue import can_wait
+from .config import settings
+from .models import Bid, User
+
+
+@dataclass(frozen=True)
+class LeaderboardRow:
+    user_id: int
+    username: str
+    wins: int
+    losses: int
+    total: int
+    amount_won: int
+
+    @property
+    def sort_key(self) -> tuple:
+        return (-self.amount_won, -self.wins, self.user_id)
+
+
+def _row(u: User) -> LeaderboardRow:
+    return LeaderboardRow(u.id, u.username, u.wins or 0, u.losses or 0, u.total_bids or 0, u.amount_won or 0)
+
+
+def _ranked_users_query(db: Session):
+    admins = settings.admin_usernames_list
+    q = db.query(User).filter(User.is_active == 1)
+    if admins:
+        q = q.filter(func.lower(User.username).notin_(admins))
+    return q
+
+
+class Leaderboard:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._rows: dict[int, LeaderboardRow] = {}
+        self._keys: list[tuple] = []  # sorted sort_keys; index + 1 = rank
+        self._loaded_at: float | None = None
+        self._generation = 0  # Bumped by invalidate(); a rebuild that straddles one stays due
+        self._rebuilding: threading.Event | None = None  # Set when the in-flight rebuild finishes
+        # Rows re-read by refresh_users while a rebuild runs (None = unranked): the rebuild's own query
+        # may predate them, so they are re-applied on top of it
+        self._refreshed: dict[int, LeaderboardRow | None] = {}
+
+    def _ensure_loaded(self, db: Session) -> None:
+        """Single-flight rebuild (as MatchCatalogue.snapshot): when the board is due, one caller rebuilds
+        while others keep reading the current rows, or wait if it was never built or was invalidated."""
+        while True:
+            with self._lock:
+                if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+                    return
+                rebuilding = self._rebuilding
+                if rebuilding is not None and self._loaded_at is not None:
+                    return  # Due, but another caller is already rebuilding
+                if rebuilding is None or not can_wait():
+                    if rebuilding is None:
+                        self._rebuilding = rebuilding = threading.Event()
+                        self._refreshed = {}
+                    else:
+                        rebuilding = None  # Event-loop caller while another rebuilds: don't block
+                    generation = self._generation
+                    break
+            rebuilding.wait(timeout=30)
+        try:
+            # Query outside the lock (see MatchCatalogue.snapshot)
+            rows = {u.id: _row(u) for u in _ranked_users_query(db).all()}
+            with self._lock:
+                if rebuilding is not None:
+                    for uid, row in self._refreshed.items():
+                        if row is None:
+                            rows.pop(uid, None)
+                        else:
+                            rows[uid] = row
+                self._rows = rows
+                self._keys = sorted(r.sort_key for r in rows.values())
+                if generation == self._generation:
+                    self._loaded_at = time.monotonic()
+        finally:
+            if rebuilding is not None:
+                with self._lock:
+                    if self._rebuilding is rebuilding:
+                        self._rebuilding = None
+                        self._refreshed = {}
+                rebuilding.set()
+        data_version.bump(data_version.LEADERBOARD)
+
+    def _apply(self, user_ids: set[int], fresh: dict[int, LeaderboardRow]) -> None:
+        """Replace rows for user_ids with `fresh` (missing = no longer ranked). Caller holds the lock."""
+        for uid in user_ids:
+            old = self._rows.pop(uid, None)
+            if old is not None:
+                i = bisect.bisect_left(self._keys, old.sort_key)
+                del self._keys[i]
+            new = fresh.get(uid)
+            if new is not None:
+                self._rows[uid] = new
+                bisect.insort(self._keys, new.sort_key)
+
+    def refresh_users(self, db: Session, user_ids) -> None:
+        """Re-read the given users' cached stats (one query) and re-rank them."""
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        if self._loaded_at is None and self._rebuilding is None:
+            data_version.bump(data_version.LEADERBOARD)
+            return  # Not built yet; the first read loads everything
+        fresh = {u.id: _row(u) for u in _ranked_users_query(db).filter(User.id.in_(user_ids)).all()}
+        with self._lock:
+            if self._rebuilding is not None:
+                self._refreshed.update({uid: fresh.get(uid) for uid in user_ids})
+            self._apply(user_ids, fresh)
+        data_version.bump(data_version.LEADERBOARD)
+
+    def refresh_for_matches(self, db: Session, match_ids) -> None:
+        """Re-rank every user who bid on the given (just settled) matches."""
+        affected = select(Bid.user_id).where(Bid.match_id.in_(list(match_ids)))
+        user_ids = {uid for (uid,) in db.execute(affected.distinct())}
+        self.refresh_users(db, user_ids)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+        data_version.bump(data_version.LEADERBOARD)
+
+    def size(self, db: Session) -> int:
+        self._ensure_loaded(db)
+        return len(self._keys)
+
+    def page(self, db: Session, offset: int = 0, limit: int | None = None) -> list[tuple[int, LeaderboardRow]]:
+        """[(rank, row)] for ranks offset+1 .. offset+limit (all remaining if limit is None)."""
+        self._ensure_loaded(db)
+        with self._lock:
+            end = len(self._keys) if limit is None else offset + limit
+            return [(i + 1, self._rows[k[2]]) for i, k in enumerate(self._keys[offset:end], start=offset)]
+
+    def around(self, db: Session, user_id: int, neighbours: int) -> tuple[int | None, list[tuple[int, LeaderboardRow]]]:
+        """(rank of user_id or None if unranked, [(rank, row)] within `neighbours` places of it)."""
+        self._ensure_loaded(db)
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                return None, []
+            i = bisect.bisect_left(self._keys, row.sort_key)
+            lo = max(0, i - neighbours)
+            return i + 1, [(j + 1, self._rows[k[2]]) for j, k in enumerate(self._keys[lo:i + neighbours + 1], start=lo)]
+
+    def version(self, db: Session) -> int:
+        self._ensure_loaded(db)
+        return data_version.current(data_version.LEADERBOARD)
+
+
+leaderboard = Leaderboard(refresh_seconds=settings.LEADERBOARD_REFRESH_SECONDS)
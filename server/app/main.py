@@ -1,100 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
 
-from .database import engine, Base, get_db, is_postgres, SessionLocal
-from .models import User, Team, Bid, MatchResult
-from .routers import auth, matches, bids, users
+from .database import engine, Base
+from .migrations import run_migrations
+from .events import broadcaster, watch_match_locks
+from .scheduler import lock_scheduler, run_lock_scheduler
+from .settlement_jobs import settlement_worker
+from .routers import auth, matches, bids, users, bootstrap, async_reads, metrics
+from .async_database import dispose_async_engine
+from .profiling import SQLProfilingMiddleware, install as install_sql_profiling
+from .metrics import MetricsMiddleware
 from .config import settings
 
 # Create tables
 Base.metadata.create_all(bind=engine)
 
-# Migration: add winner_team_id if not exists (SQLite)
-try:
-    with engine.begin() as conn:
-        conn.execute(text("ALTER TABLE matches ADD COLUMN winner_team_id INTEGER"))
-except Exception:
-    pass  # Column may already exist
-
-# Migration: add venue if not exists (SQLite)
-try:
-    with engine.begin() as conn:
-        conn.execute(text("ALTER TABLE matches ADD COLUMN venue VARCHAR(100)"))
-except Exception:
-    pass  # Column may already exist
-
-# Migration: add series if not exists (SQLite)
-try:
-    with engine.begin() as conn:
-        conn.execute(text("ALTER TABLE matches ADD COLUMN series VARCHAR(30) DEFAULT 'worldcup'"))
-except Exception:
-    pass  # Column may already exist
-
-# Migration: drop bids.match_id FK for PostgreSQL (matches now from match_data)
-if is_postgres:
-    try:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE bids DROP CONSTRAINT IF EXISTS bids_match_id_fkey"))
-    except Exception:
-        pass
+install_sql_profiling(engine)
 
-# Migration: add amount_won to bids
-try:
-    with engine.begin() as conn:
-        conn.execute(text("ALTER TABLE bids ADD COLUMN amount_won INTEGER"))
-except Exception:
-    pass
+# Schema/data migrations: each runs once and is recorded in schema_migrations
+run_migrations(engine)
 
-# Migration: add mobile_number, is_active to users
-try:
-    with engine.begin() as conn:
-        conn.execute(text("ALTER TABLE users ADD COLUMN mobile_number VARCHAR(15)"))
-except Exception:
-    pass
-try:
-    with engine.begin() as conn:
-        conn.execute(text("ALTER TABLE users ADD COLUMN is_active INTEGER DEFAULT 1"))
-except Exception:
-    pass
 
-# Migration: add cached stats columns to users (total_bids, wins, losses, amount_won)
-for col, default in [
-    ("total_bids", "0"),
-    ("wins", "0"),
-    ("losses", "0"),
-    ("amount_won", "0"),
-]:
-    try:
-        with engine.begin() as conn:
-            conn.execute(text(f"ALTER TABLE users ADD COLUMN {col} INTEGER DEFAULT {default}"))
-    except Exception:
-        pass
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    broadcaster.bind(asyncio.get_running_loop())
+    settlement_worker.start()
+    tasks = [asyncio.create_task(watch_match_locks())]
+    if settings.LOCK_SCHEDULER_ENABLED:
+        tasks.append(asyncio.create_task(run_lock_scheduler()))
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    if settings.LOCK_SCHEDULER_ENABLED:
+        await run_in_threadpool(lock_scheduler.stop)
+    await run_in_threadpool(settlement_worker.stop)
+    await dispose_async_engine()
 
 
-def _backfill_user_stats():
-    """Recalculate total_bids, wins, losses, amount_won from bids for all users."""
-    from .models import User, Bid
-    db = SessionLocal()
-    try:
-        users = db.query(User).all()
-        for u in users:
-            bids = db.query(Bid).filter(Bid.user_id == u.id).all()
-            u.total_bids = len(bids)
-            u.wins = sum(1 for b in bids if b.bid_status == "won")
-            u.losses = sum(1 for b in bids if b.bid_status == "lost")
-            u.amount_won = sum(b.amount_won or 0 for b in bids)
-        db.commit()
-    finally:
-        db.close()
-
-
-_backfill_user_stats()
-
 app = FastAPI(
     title="TVS-Bids",
     description="Bid on cricket match outcomes",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -103,12 +57,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Next-Cursor", "X-Server-Time"],
 )
 
+if settings.SQL_PROFILING_ENABLED:
+    app.add_middleware(SQLProfilingMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if settings.ASYNC_DB_ENABLED:
+    # Registered first so these paths resolve to the async handlers; the sync twins document them
+    app.include_router(async_reads.matches_router, prefix="/matches", include_in_schema=False)
+    app.include_router(async_reads.bids_router, prefix="/bids", include_in_schema=False)
+    app.include_router(async_reads.users_router, prefix="/users", include_in_schema=False)
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(matches.router, prefix="/matches", tags=["matches"])
 app.include_router(bids.router, prefix="/bids", tags=["bids"])
 app.include_router(users.router, prefix="/users", tags=["users"])
+app.include_router(bootstrap.router, tags=["bootstrap"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -0,0 +1,170 @@
+"""Pre-serialized match list responses (GET /matches/, /matches/today).
+
+The static part of every match (teams, date, venue, status, winner, start_ts, ...) is validated
+through MatchResponse and encoded to JSON once per catalogue version and list (series, or today's
+date). Each request only appends the one time-dependent field, is_locked, and joins the cached
+bytes, so a hit does no Pydantic work and no dict building. Entries are dropped when the catalogue
+version changes.
+
+Encoding uses orjson (requirements.txt); the json module is used if it is missing (e.g. an older venv).
+"""
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from .catalogue import CatalogueSnapshot, catalogue
+from .conditional import match_list_etag_from_counts
+from .match_service import get_today_str, match_is_locked, now_utc
+from .schemas import MatchResponse
+
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+_LOCKED_TAIL = b',"is_locked":true}'
+_OPEN_TAIL = b',"is_locked":false}'
+
+
+@dataclass(frozen=True)
+class CachedMatchList:
+    heads: tuple[bytes, ...]  # Each match's JSON object without is_locked and its closing brace
+    start_ts: tuple[float | None, ...]
+    statuses: tuple[str, ...]
+
+
+_EMPTY = CachedMatchList(heads=(), start_ts=(), statuses=())  # Served, never stored, for unknown series
+
+
+def _encode_head(match: dict) -> bytes:
+    body = MatchResponse.model_validate({**match, "is_locked": False}).model_dump(mode="json", exclude={"is_locked"})
+    encoded = dumps(body)
+    return encoded[:-1]  # Drop "}" so is_locked can be appended
+
+
+class MatchListCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._lists: dict[tuple, CachedMatchList] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def peek(self, series: str | None = None, match_date: str | None = None) -> tuple[int, CachedMatchList] | None:
+        """Like get() but without a DB session: None unless the catalogue is fresh and the list is cached."""
+        snap = catalogue.peek()
+        if snap is None:
+            return None
+        with self._lock:
+            cached = self._lists.get((series, match_date)) if self._version == snap.version else None
+            if cached is not None:
+                self.hits += 1
+                return snap.version, cached
+        return None
+
+    def get(
+        self,
+        db: Session,
+        series: str | None = None,
+        match_date: str | None = None,
+        snap: CatalogueSnapshot | None = None,
+    ) -> tuple[int, CachedMatchList]:
+        """(catalogue version, cached list) for matches in `series` and/or on `match_date`, from `snap`
+        (default: the current catalogue snapshot)."""
+        snap = snap or catalogue.snapshot(db)
+        key = (series, match_date)
+        with self._lock:
+            if self._version == snap.version and key in self._lists:
+                self.hits += 1
+                return snap.version, self._lists[key]
+            self.misses += 1
+        ids = [
+            i for i in snap.ordered_ids
+            if (series is None or snap.matches[i]["series"] == series)
+            and (match_date is None or snap.matches[i]["match_date"] == match_date)
+        ]
+        if not ids and series is not None and not any(m["series"] == series for m in snap.matches.values()):
+            # ?series= is public: don't let arbitrary values grow the cache
+            return snap.version, _EMPTY
+        cached = CachedMatchList(
+            heads=tuple(
+                _encode_head({
+                    **snap.matches[i],
+                    "winner_team_id": snap.results.get(i),
+                    "start_ts": int(snap.start_ts[i]) if snap.start_ts[i] is not None else None,
+                })
+                for i in ids
+            ),
+            start_ts=tuple(snap.start_ts[i] for i in ids),
+            statuses=tuple(snap.matches[i]["status"] for i in ids),
+        )
+        with self._lock:
+            if self._version != snap.version:
+                if self._version is not None and snap.version < self._version:
+                    return snap.version, cached  # An older snapshot: serve it, don't cache it
+                self._version, self._lists = snap.version, {}
+            self._lists[key] = cached
+        return snap.version, cached
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._lists),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+def render(cached: CachedMatchList, now: datetime) -> tuple[bytes, int]:
+    """(JSON body, number locked) for the list at `now`."""
+    now_ts = now.timestamp()
+    parts = []
+    locked = 0
+    for head, start_ts, status in zip(cached.heads, cached.start_ts, cached.statuses):
+        if match_is_locked(start_ts, now_ts, status):
+            locked += 1
+            parts.append(head + _LOCKED_TAIL)
+        else:
+            parts.append(head + _OPEN_TAIL)
+    return b"[" + b",".join(parts) + b"]", locked
+
+
+def _body(version: int, cached: CachedMatchList, etag_extra: tuple) -> tuple[str, bytes]:
+    body, locked = render(cached, now_utc())
+    return match_list_etag_from_counts(version, len(cached.heads), locked, *etag_extra), body
+
+
+def match_list_body(
+    db: Session, series: str | None = None, match_date: str | None = None, *etag_extra
+) -> tuple[str, bytes]:
+    """(ETag, JSON body) for a match list; the ETag equals conditional.match_list_etag for the same list."""
+    version, cached = match_list_cache.get(db, series, match_date)
+    return _body(version, cached, etag_extra)
+
+
+def cached_match_list_body(
+    series: str | None = None, match_date: str | None = None, *etag_extra
+) -> tuple[str, bytes] | None:
+    """match_list_body without a DB session, or None when the catalogue/list must be (re)loaded first.
+    Lets the list endpoints answer on the event loop without a threadpool hop or a session."""
+    hit = match_list_cache.peek(series, match_date)
+    return _body(*hit, etag_extra) if hit else None
+
+
+def today_list_and_teams(db: Session) -> tuple[bytes, list[dict]]:
+    """(/matches/today JSON body, teams), both from one catalogue snapshot. For GET /bootstrap."""
+    snap = catalogue.snapshot(db)
+    _, cached = match_list_cache.get(db, None, get_today_str(), snap=snap)
+    body, _ = render(cached, now_utc())
+    return body, list(snap.teams)
+
+
+match_list_cache = MatchListCache()
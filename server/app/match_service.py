@@ -1,8 +1,8 @@
-"""Match operations using database. Replaces match_data for runtime match queries."""
+"""Match operations backed by the in-process catalogue (see catalogue.py). Replaces match_data for runtime match queries."""
 from datetime import datetime
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
-from .models import Match, MatchResult
+from .catalogue import catalogue
 from .config import settings
 
 try:
@@ -20,32 +20,8 @@ except (ImportError, Exception):
     _get_tz = lambda _: _UTC  # Fallback: use UTC for all
 
 
-def _parse_match_datetime(match_date: str, match_time: str):
-    """Parse match date/time as naive datetime in MATCH_TIMEZONE, return timezone-aware UTC."""
-    match_dt = datetime.strptime(f"{match_date} {match_time}", "%Y-%m-%d %H:%M")
-    tz = _get_tz(settings.MATCH_TIMEZONE)
-    if tz:
-        return match_dt.replace(tzinfo=tz).astimezone(_UTC)
-    return match_dt  # Fallback: treat as UTC if zoneinfo unavailable
-
-
-def _is_match_locked(match_date: str, match_time: str) -> bool:
-    try:
-        match_dt_utc = _parse_match_datetime(match_date, match_time)
-        now_utc = datetime.now(_UTC) if _UTC else datetime.utcnow()
-        return now_utc >= match_dt_utc
-    except (ValueError, Exception):
-        return False
-
-
-def _seconds_until_start(match_date: str, match_time: str) -> int | None:
-    try:
-        match_dt_utc = _parse_match_datetime(match_date, match_time)
-        now_utc = datetime.now(_UTC) if _UTC else datetime.utcnow()
-        delta = (match_dt_utc - now_utc).total_seconds()
-        return max(0, int(delta)) if delta > 0 else None
-    except (ValueError, Exception):
-        return None
+def now_utc() -> datetime:
+    return datetime.now(_UTC) if _UTC else datetime.utcnow()
 
 
 def get_today_str() -> str:
@@ -56,53 +32,109 @@ def get_today_str() -> str:
     return datetime.utcnow().strftime("%Y-%m-%d")
 
 
-def _match_to_dict(m: Match, winner_team_id: int | None = None) -> dict:
-    """Convert Match ORM to MatchResponse-style dict."""
-    is_locked = _is_match_locked(m.match_date, m.match_time)
-    secs = _seconds_until_start(m.match_date, m.match_time)
+def match_is_locked(start_ts: float | None, now_ts: float, status: str = "upcoming") -> bool:
+    """Locked once the stored status has left "upcoming" (set by the lock scheduler) or the precomputed
+    start timestamp has passed (None = unparseable: open)."""
+    return status != "upcoming" or (start_ts is not None and now_ts >= start_ts)
+
+
+def _match_to_dict(m: dict, winner_team_id: int | None, start_ts: float | None, now_ts: float) -> dict:
+    """Convert a catalogue match entry to a MatchResponse-style dict. Clients count down to start_ts
+    themselves, so the dict only changes when the match locks (see conditional.py)."""
     return {
-        "id": m.id,
-        "team1": {"id": m.team1.id, "name": m.team1.name, "short_name": m.team1.short_name},
-        "team2": {"id": m.team2.id, "name": m.team2.name, "short_name": m.team2.short_name},
-        "match_date": m.match_date,
-        "match_time": m.match_time,
-        "venue": m.venue or "",
-        "match_type": m.match_type,
-        "series": m.series or "worldcup",
-        "status": m.status or "upcoming",
+        **m,
         "winner_team_id": winner_team_id,
-        "is_locked": is_locked,
-        "seconds_until_start": secs,
+        "start_ts": int(start_ts) if start_ts is not None else None,
+        "is_locked": match_is_locked(start_ts, now_ts, m["status"]),
     }
 
 
-def get_matches(db: Session, series: str | None = None) -> list[dict]:
-    """Return matches from DB as MatchResponse format."""
-    q = db.query(Match).options(joinedload(Match.team1), joinedload(Match.team2)).order_by(Match.match_date, Match.match_time)
+def get_matches(db: Session, series: str | None = None, now: datetime | None = None) -> list[dict]:
+    """Return matches from the catalogue as MatchResponse format. `now` (UTC) defaults to the current time."""
+    snap = catalogue.snapshot(db)
+    now_ts = (now or now_utc()).timestamp()
+    matches = (snap.matches[i] for i in snap.ordered_ids)
     if series:
-        q = q.filter(Match.series == series)
-    matches = q.all()
-    results = {r.match_id: r.winner_team_id for r in db.query(MatchResult).all()}
-    return [_match_to_dict(m, results.get(m.id)) for m in matches]
+        matches = (m for m in matches if m["series"] == series)
+    return [
+        _match_to_dict(m, snap.results.get(m["id"]), snap.start_ts[m["id"]], now_ts)
+        for m in matches
+    ]
 
 
-def get_match_by_id(db: Session, match_id: int) -> dict | None:
-    """Get match by id from DB."""
-    m = db.query(Match).options(joinedload(Match.team1), joinedload(Match.team2)).filter(Match.id == match_id).first()
+def get_match_by_id(db: Session, match_id: int, now: datetime | None = None) -> dict | None:
+    """Get match by id from the catalogue."""
+    snap = catalogue.snapshot(db)
+    m = snap.matches.get(match_id)
     if not m:
         return None
-    result = db.query(MatchResult).filter(MatchResult.match_id == match_id).first()
-    winner_team_id = result.winner_team_id if result else None
-    return _match_to_dict(m, winner_team_id)
+    now_ts = (now or now_utc()).timestamp()
+    return _match_to_dict(m, snap.results.get(match_id), snap.start_ts[match_id], now_ts)
+
+
+def get_matches_by_ids(db: Session, match_ids, now: datetime | None = None) -> dict[int, dict]:
+    """{match_id: match} for the given ids, all from one catalogue snapshot. Unknown ids are omitted."""
+    snap = catalogue.snapshot(db)
+    now_ts = (now or now_utc()).timestamp()
+    return {
+        i: _match_to_dict(snap.matches[i], snap.results.get(i), snap.start_ts[i], now_ts)
+        for i in match_ids
+        if i in snap.matches
+    }
+
+
+def get_match_ids(
+    db: Session, series: str | None = None, match_type: str | None = None, match_date: str | None = None
+) -> list[int]:
+    """Ids of catalogue matches matching every given filter (all matches if none is given)."""
+    return [
+        m["id"] for m in catalogue.snapshot(db).matches.values()
+        if (series is None or m["series"] == series)
+        and (match_type is None or m["match_type"] == match_type)
+        and (match_date is None or m["match_date"] == match_date)
+    ]
+
+
+def get_lock_times(db: Session, after: datetime | None = None) -> list[tuple[datetime, int]]:
+    """[(start time UTC, match_id)] sorted by time, for matches starting after `after` (all if None)."""
+    snap = catalogue.snapshot(db)
+    locks = snap.locks_after(after.timestamp() if after else None)
+    return [(datetime.fromtimestamp(ts, _UTC), match_id) for ts, match_id in locks]
+
+
+def get_next_lock_time(db: Session, now: datetime | None = None) -> datetime | None:
+    """When the next match after `now` starts (bidding closes), or None if none is scheduled."""
+    ts = catalogue.snapshot(db).next_lock_time((now or now_utc()).timestamp())
+    return datetime.fromtimestamp(ts, _UTC) if ts is not None else None
+
+
+def get_catalogue_version(db: Session) -> int:
+    """Version of the current catalogue snapshot; changes whenever matches/results are reloaded."""
+    return catalogue.snapshot(db).version
 
 
 def get_match_type(db: Session, match_id: int) -> str | None:
     """Get match_type for a match_id (for bid limits)."""
-    m = db.query(Match).filter(Match.id == match_id).first()
-    return m.match_type if m else None
+    m = catalogue.snapshot(db).matches.get(match_id)
+    return m["match_type"] if m else None
 
 
 def get_match_team_ids(db: Session, match_id: int) -> tuple[int, int] | None:
     """Get (team1_id, team2_id) for a match_id."""
-    m = db.query(Match).filter(Match.id == match_id).first()
-    return (m.team1_id, m.team2_id) if m else None
+    m = catalogue.snapshot(db).matches.get(match_id)
+    return (m["team1"]["id"], m["team2"]["id"]) if m else None
+
+
+def get_teams(db: Session) -> list[dict]:
+    """All teams from the catalogue."""
+    return list(catalogue.snapshot(db).teams)
+
+
+def get_results(db: Session) -> dict[int, int | None]:
+    """Confirmed results: match_id -> winner_team_id (None = rain/no result)."""
+    return dict(catalogue.snapshot(db).results)
+
+
+def invalidate_matches() -> None:
+    """Call after writing matches, teams or results so the next read reloads the catalogue."""
+    catalogue.invalidate()
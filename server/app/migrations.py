@@ -0,0 +1,159 @@
+"""Versioned schema and data migrations, run once at startup.
+
+Each migration runs in its own transaction and is recorded in schema_migrations, so a boot where
+everything is applied costs one SELECT. Column additions check the live schema first instead of
+relying on a failing ALTER. On PostgreSQL an advisory lock serializes workers booting together.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import case, func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from .models import Bid, Match, MatchResult, MatchStatus, SchedulerLease, SchemaMigration, SettlementJob, User
+
+logger = logging.getLogger(__name__)
+
+_ADVISORY_LOCK_KEY = 7412001  # arbitrary, app-wide
+_MIGRATIONS: list[tuple[int, str, callable]] = []
+
+
+def migration(version: int, name: str):
+    def register(fn):
+        _MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+@migration(1, "matches.winner_team_id")
+def _m1(conn):
+    _add_column(conn, "matches", "winner_team_id", "INTEGER")
+
+
+@migration(2, "matches.venue")
+def _m2(conn):
+    _add_column(conn, "matches", "venue", "VARCHAR(100)")
+
+
+@migration(3, "matches.series")
+def _m3(conn):
+    _add_column(conn, "matches", "series", "VARCHAR(30) DEFAULT 'worldcup'")
+
+
+@migration(4, "drop bids.match_id foreign key")
+def _m4(conn):
+    # Matches used to come from match_data, so bids.match_id has no FK (PostgreSQL only)
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE bids DROP CONSTRAINT IF EXISTS bids_match_id_fkey"))
+
+
+@migration(5, "bids.amount_won")
+def _m5(conn):
+    _add_column(conn, "bids", "amount_won", "INTEGER")
+
+
+@migration(6, "users.mobile_number, users.is_active")
+def _m6(conn):
+    _add_column(conn, "users", "mobile_number", "VARCHAR(15)")
+    _add_column(conn, "users", "is_active", "INTEGER DEFAULT 1")
+
+
+@migration(7, "users cached stats columns")
+def _m7(conn):
+    for col in ("total_bids", "wins", "losses", "amount_won"):
+        _add_column(conn, "users", col, "INTEGER DEFAULT 0")
+
+
+@migration(8, "reconcile users cached stats")
+def _m8(conn):
+    reconcile_user_stats(conn)
+
+
+@migration(9, "bids/matches indexes, unique bids(user_id, match_id)")
+def _m9(conn):
+    # Concurrent place_bid calls could insert two bids for the same match; keep the first
+    dupes = conn.execute(text(
+        "DELETE FROM bids WHERE id NOT IN (SELECT MIN(id) FROM bids GROUP BY user_id, match_id)"
+    )).rowcount
+    for index in (*Bid.__table__.indexes, *Match.__table__.indexes):
+        index.create(bind=conn, checkfirst=True)
+    if dupes:
+        logger.warning("Removed %s duplicate bids before adding uq_bids_user_match", dupes)
+        reconcile_user_stats(conn)
+
+
+@migration(10, "bids(user_id, created_at, id) index for keyset pagination")
+def _m10(conn):
+    conn.execute(text("DROP INDEX IF EXISTS ix_bids_user_created"))
+    for index in Bid.__table__.indexes:
+        index.create(bind=conn, checkfirst=True)
+
+
+@migration(11, "scheduler_leases table, completed status for settled matches")
+def _m11(conn):
+    SchedulerLease.__table__.create(bind=conn, checkfirst=True)
+    # Settlement now marks matches completed; backfill the ones settled before that
+    conn.execute(
+        update(Match)
+        .where(Match.id.in_(select(MatchResult.match_id)))
+        .values(status=MatchStatus.COMPLETED.value)
+    )
+
+
+@migration(12, "settlement_jobs table")
+def _m12(conn):
+    SettlementJob.__table__.create(bind=conn, checkfirst=True)
+
+
+def reconcile_user_stats(conn: Connection) -> None:
+    """Recompute users.total_bids/wins/losses/amount_won from bids with one aggregate query."""
+    stats = (
+        select(
+            Bid.user_id.label("user_id"),
+            func.count(Bid.id).label("total_bids"),
+            func.sum(case((Bid.bid_status == "won", 1), else_=0)).label("wins"),
+            func.sum(case((Bid.bid_status == "lost", 1), else_=0)).label("losses"),
+            func.coalesce(func.sum(Bid.amount_won), 0).label("amount_won"),
+        )
+        .where(Bid.selected_team_id.isnot(None))
+        .group_by(Bid.user_id)
+        .subquery()
+    )
+    conn.execute(update(User).values(total_bids=0, wins=0, losses=0, amount_won=0))
+    conn.execute(
+        update(User)
+        .where(User.id == stats.c.user_id)
+        .values(
+            total_bids=stats.c.total_bids,
+            wins=stats.c.wins,
+            losses=stats.c.losses,
+            amount_won=stats.c.amount_won,
+        )
+    )
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Apply pending migrations in version order. Returns the versions applied by this call."""
+    SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(SchemaMigration.version)).scalars())
+    done = []
+    for version, name, fn in sorted(_MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+                if conn.execute(select(SchemaMigration.version).where(SchemaMigration.version == version)).first():
+                    continue  # Applied by another worker while we waited for the lock
+            logger.info("Applying migration %s: %s", version, name)
+            fn(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        done.append(version)
+    return done
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -46,6 +46,9 @@ class Team(Base):
 
 class Match(Base):
     __tablename__ = "matches"
+    __table_args__ = (
+        Index("ix_matches_series_date_time", "series", "match_date", "match_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     team1_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
@@ -75,6 +78,12 @@ class MatchResult(Base):
 
 class Bid(Base):
     __tablename__ = "bids"
+    __table_args__ = (
+        # One bid per user per match; also serves every user_id-leading lookup
+        Index("uq_bids_user_match", "user_id", "match_id", unique=True),
+        Index("ix_bids_user_created_id", "user_id", "created_at", "id"),  # my bids, keyset pages newest first
+        Index("ix_bids_match_team", "match_id", "selected_team_id"),  # breakdown, settlement
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -87,3 +96,41 @@ class Bid(Base):
 
     user = relationship("User", back_populates="bids")
     selected_team = relationship("Team", foreign_keys=[selected_team_id])
+
+
+class SchedulerLease(Base):
+    """Leader lease for background work that must run on one worker process at a time (scheduler.py)."""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class SettlementJob(Base):
+    """A queued match-result confirmation, run by the settlement worker (settlement_jobs.py)."""
+    __tablename__ = "settlement_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    match_key = Column(String(500), unique=True, nullable=False)  # Sorted match ids: one job per set of matches
+    results = Column(Text, nullable=False)  # JSON {match_id: winner_team_id}
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, finishing, done, failed
+    matches_total = Column(Integer, nullable=False)
+    matches_settled = Column(Integer, nullable=False, default=0)
+    summary = Column(Text, nullable=True)  # JSON list of SettlementResult dicts once settled
+    error = Column(String(500), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    claimed_by = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class SchemaMigration(Base):
+    """Applied schema/data migrations (see migrations.py). One row per version."""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,132 @@
+"""Opt-in SQL instrumentation: statements and DB time per request, Server-Timing headers, slow-query log.
+
+SQL_PROFILING_ENABLED installs SQLAlchemy cursor hooks on the engines and SQLProfilingMiddleware, which
+puts a RequestStats in a context variable for each request. The hooks add every statement's count and
+duration to it (sync routes run in a worker thread with a copy of the request context, so they see the
+same object). The response gets a Server-Timing header, e.g.
+
+    Server-Timing: db;dur=4.2;desc="6 queries", app;dur=11.8
+
+and each request is logged with its query count. Requests running SQL_PROFILING_QUERY_WARN or more
+statements are logged as warnings, which is where N+1 loops show up.
+
+SLOW_QUERY_MS (independently of SQL_PROFILING_ENABLED) logs any statement slower than the threshold,
+with literals stripped so the same query from different requests groups together in the logs.
+"""
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    __slots__ = ("path", "statements", "db_seconds")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("sql_request_stats", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"\(\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+))+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str, max_length: int = 500) -> str:
+    """Collapse whitespace, replace literals with ? and IN-lists with (...), so equal queries compare equal."""
+    s = _STRING.sub("?", statement)
+    s = _NUMBER.sub("?", s)
+    s = _PLACEHOLDERS.sub("(...)", s)
+    s = _SPACE.sub(" ", s).strip()
+    return s if len(s) <= max_length else s[: max_length - 3] + "..."
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def is_enabled() -> bool:
+    return settings.SQL_PROFILING_ENABLED or settings.SLOW_QUERY_MS > 0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+    if settings.SLOW_QUERY_MS > 0 and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query %.1fms%s: %s",
+            elapsed * 1000, f" ({stats.path})" if stats else "", normalize_statement(statement),
+        )
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def install(engine) -> None:
+    """Attach the timing hooks to a (sync) engine; for an AsyncEngine pass engine.sync_engine."""
+    if not is_enabled() or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class SQLProfilingMiddleware:
+    """ASGI middleware: collects RequestStats per HTTP request and reports them (see module docstring)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(scope["path"])
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                timing = (
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            total_ms = (time.perf_counter() - start) * 1000
+            warn = settings.SQL_PROFILING_QUERY_WARN and stats.statements >= settings.SQL_PROFILING_QUERY_WARN
+            logger.log(
+                logging.WARNING if warn else logging.INFO,
+                "%s %s %s: %d queries, %.1fms db, %.1fms total",
+                scope["method"], scope["path"], status, stats.statements, stats.db_seconds * 1000, total_ms,
+            )
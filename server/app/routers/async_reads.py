@@ -0,0 +1,89 @@
+"""Async versions of the hot read endpoints, mounted ahead of the sync routes when ASYNC_DB_ENABLED.
+
+Each handler runs on the event loop with an AsyncSession and reuses the sync route's query helper
+through AsyncSession.run_sync, so both paths return identical responses. Writes and admin routes
+stay on the sync engine.
+"""
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..async_database import get_async_db
+from ..auth import Principal, get_current_user_async
+from ..schemas import BidResponse, LeaderboardEntry, MatchResponse
+from .bids import _history_params, _my_bid_for_match, _my_bids, _my_bids_for_matches, _parse_match_ids
+from .matches import _cached_match_list_bytes, _match_list_bytes, _match_list_response
+from .users import _leaderboard_page, _leaderboard_response
+
+matches_router = APIRouter()
+bids_router = APIRouter()
+users_router = APIRouter()
+
+
+@matches_router.get("/", response_model=list[MatchResponse])
+async def list_matches(
+    request: Request,
+    series: str | None = Query(None, description="Filter by series: ipl, worldcup, etc."),
+    db: AsyncSession = Depends(get_async_db),
+):
+    etag, body = _cached_match_list_bytes(series) or await db.run_sync(_match_list_bytes, series)
+    return _match_list_response(request, etag, body)
+
+
+@matches_router.get("/today", response_model=list[MatchResponse])
+async def list_today_matches(request: Request, db: AsyncSession = Depends(get_async_db)):
+    etag, body = _cached_match_list_bytes(today_only=True) or await db.run_sync(_match_list_bytes, None, True)
+    return _match_list_response(request, etag, body)
+
+
+@bids_router.get("/my", response_model=list[BidResponse])
+async def my_bids(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
+    series: str | None = Query(None),
+    bid_status: str | None = Query(None, alias="status"),
+    match_type: str | None = Query(None),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    after = _history_params(cursor, bid_status, match_type)
+    bids, next_cursor = await db.run_sync(
+        _my_bids, current_user.id, limit, after, series, bid_status, match_type
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return bids
+
+
+@bids_router.get("/for-matches", response_model=list[BidResponse])
+async def get_my_bids_for_matches(
+    match_ids: str | None = Query(None),
+    series: str | None = Query(None),
+    match_date: str | None = Query(None, alias="date"),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    ids = _parse_match_ids(match_ids)
+    return await db.run_sync(_my_bids_for_matches, current_user.id, ids, series, match_date)
+
+
+@bids_router.get("/for-match/{match_id}")
+async def get_my_bid_for_match(
+    match_id: int,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(_my_bid_for_match, current_user.id, match_id)
+
+
+@users_router.get("/leaderboard", response_model=list[LeaderboardEntry])
+async def get_leaderboard(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1, le=500, description="Page size; omit for the full board"),
+    db: AsyncSession = Depends(get_async_db),
+    _=Depends(get_current_user_async)
+):
+    etag, entries = await db.run_sync(_leaderboard_page, offset, limit)
+    return _leaderboard_response(request, response, etag, entries)
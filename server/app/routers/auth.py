@@ -1,12 +1,14 @@
 import re
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import User
-from ..schemas import UserCreate, UserLogin, Token, UserResponse
-from ..auth import get_password_hash, create_access_token, verify_password
+from ..schemas import UserCreate, UserLogin, Token, UserResponse, StreamToken
+from ..auth import Principal, create_access_token, create_stream_token, get_current_user, get_password_hash_async, verify_password_async
 from ..config import settings
+from ..leaderboard import leaderboard
 
 router = APIRouter()
 
@@ -25,15 +27,8 @@ def _normalize_mobile(mobile: str) -> str:
     return re.sub(r"\D", "", mobile)
 
 
-@router.post("/register", response_model=Token)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    mobile = _normalize_mobile(user_data.mobile_number)
-    if len(mobile) != 10 or not mobile.startswith(("6", "7", "8", "9")):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Enter a valid 10-digit Indian mobile number"
-        )
-    if db.query(User).filter(User.username == user_data.username).first():
+def _check_available(db: Session, username: str, mobile: str) -> None:
+    if db.query(User).filter(User.username == username).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
@@ -43,19 +38,43 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This mobile number is already registered. One account per mobile."
         )
-    if len(user_data.password) < 6:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Password must be at least 6 characters"
-        )
+
+
+def _create_user(db: Session, username: str, hashed_password: str, mobile: str) -> User:
     user = User(
-        username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
+        username=username,
+        hashed_password=hashed_password,
         mobile_number=mobile,
     )
     db.add(user)
     db.commit()
     db.refresh(user)
+    return user
+
+
+def _get_user_by_username(db: Session, username: str) -> User | None:
+    return db.query(User).filter(User.username == username).first()
+
+
+# Async handlers: bcrypt runs on the bounded hashing pool, DB work on the threadpool,
+# so neither blocks the event loop.
+@router.post("/register", response_model=Token)
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    mobile = _normalize_mobile(user_data.mobile_number)
+    if len(mobile) != 10 or not mobile.startswith(("6", "7", "8", "9")):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Enter a valid 10-digit Indian mobile number"
+        )
+    await run_in_threadpool(_check_available, db, user_data.username, mobile)
+    if len(user_data.password) < 6:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Password must be at least 6 characters"
+        )
+    hashed_password = await get_password_hash_async(user_data.password)
+    user = await run_in_threadpool(_create_user, db, user_data.username, hashed_password, mobile)
+    await run_in_threadpool(leaderboard.refresh_users, db, [user.id])
     token = create_access_token(data={"sub": str(user.id)})
     return Token(
         access_token=token,
@@ -65,9 +84,9 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == credentials.username).first()
-    if not user or not verify_password(credentials.password, user.hashed_password):
+async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_get_user_by_username, db, credentials.username)
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -84,3 +103,12 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         token_type="bearer",
         user=_user_response(user)
     )
+
+
+@router.post("/stream-token", response_model=StreamToken)
+async def stream_token(current_user: Principal = Depends(get_current_user)):
+    """Short-lived token for GET /matches/stream?access_token=... (see auth.create_stream_token)."""
+    return StreamToken(
+        access_token=create_stream_token(current_user.id),
+        expires_in=settings.STREAM_TOKEN_EXPIRE_SECONDS,
+    )
@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import User, Bid
-from ..schemas import BidCreate, BidResponse
-from ..auth import get_current_user
+from ..schemas import BidCreate, BidResponse, BidBatch, BidBatchItemResult, BidBatchResponse
+from ..auth import Principal, get_current_user
 from ..config import settings
-from ..match_service import get_match_by_id, get_match_type, get_match_team_ids
+from ..leaderboard import leaderboard
+from ..match_service import get_match_by_id, get_match_ids, get_match_type, get_match_team_ids, get_matches_by_ids
+from ..bid_service import get_stage_usage, team_counts_cache
+from ..events import broadcaster
+from ..metrics import bids_changed, bids_placed, bids_rejected
+from ..scheduler import MISSED_STATUS
 
 router = APIRouter()
 
+BID_BATCH_MAX = 50  # picks per POST /bids/batch
+
 
 def _get_bid_limit(match_type: str) -> int:
     if match_type == "league":
@@ -21,29 +33,43 @@ def _get_bid_limit(match_type: str) -> int:
     return 0
 
 
+def _bid_written(db: Session, match_id: int) -> None:
+    """After committing a bid for match_id: drop its cached counts and push the new ones to live clients."""
+    team_counts_cache.invalidate(match_id)
+    if broadcaster.subscriber_count:
+        counts = team_counts_cache.get(db, match_id)
+        broadcaster.publish("bid_counts", {"match_id": match_id, "counts": {str(t): n for t, n in counts.items()}})
+
+
 def _get_user_bid_count_for_type(db: Session, user_id: int, match_type: str) -> int:
-    bids = db.query(Bid).filter(Bid.user_id == user_id).all()
-    return sum(1 for b in bids if get_match_type(db, b.match_id) == match_type)
+    return get_stage_usage(db, user_id).get(match_type, 0)
+
+
+def _reject_locked():
+    bids_rejected.inc("locked")
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Match has started. Bidding is closed."
+    )
 
 
 @router.post("/", response_model=BidResponse)
 def place_bid(
     bid_data: BidCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> BidResponse:
     match = get_match_by_id(db, bid_data.match_id)
     if not match:
+        bids_rejected.inc("not_found")
         raise HTTPException(status_code=404, detail="Match not found")
 
     if match["is_locked"]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Match has started. Bidding is closed."
-        )
+        _reject_locked()
 
     team_ids = get_match_team_ids(db, bid_data.match_id)
     if not team_ids or bid_data.selected_team_id not in team_ids:
+        bids_rejected.inc("invalid_team")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid team selection"
@@ -57,9 +83,13 @@ def place_bid(
 
     # If a bid already exists and the match is still open, allow changing the team
     if existing:
+        if existing.bid_status == MISSED_STATUS:
+            _reject_locked()  # The scheduler locked the match after our snapshot was taken
         existing.selected_team_id = bid_data.selected_team_id
         existing.bid_status = "placed"
         db.commit()
+        bids_changed.inc(match["match_type"])
+        _bid_written(db, bid_data.match_id)
         db.refresh(existing)
         return BidResponse.model_validate(existing)
 
@@ -68,6 +98,7 @@ def place_bid(
     used = _get_user_bid_count_for_type(db, current_user.id, mtype)
     limit = _get_bid_limit(mtype)
     if used >= limit:
+        bids_rejected.inc("limit")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"You have reached the bid limit ({limit}) for {match['match_type']} matches"
@@ -80,31 +111,273 @@ def place_bid(
         bid_status="placed"
     )
     db.add(bid)
-    current_user.total_bids = (current_user.total_bids or 0) + 1
-    db.commit()
+    db.query(User).filter(User.id == current_user.id).update(
+        {User.total_bids: func.coalesce(User.total_bids, 0) + 1}, synchronize_session=False
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request inserted this user's bid first (uq_bids_user_match): change its team instead
+        db.rollback()
+        existing = db.query(Bid).filter(
+            Bid.user_id == current_user.id,
+            Bid.match_id == bid_data.match_id
+        ).one()
+        if existing.bid_status == MISSED_STATUS:
+            _reject_locked()  # The lock scheduler's missed-bid insert won the race: the match has started
+        existing.selected_team_id = bid_data.selected_team_id
+        existing.bid_status = "placed"
+        db.commit()
+        bids_changed.inc(mtype)
+        _bid_written(db, bid_data.match_id)
+        db.refresh(existing)
+        return BidResponse.model_validate(existing)
+    bids_placed.inc(mtype)
+    leaderboard.refresh_users(db, [current_user.id])  # total_bids changed
+    _bid_written(db, bid_data.match_id)
     db.refresh(bid)
     return BidResponse.model_validate(bid)
 
 
+def _place_bid_batch(db: Session, user_id: int, items: list[BidCreate]) -> BidBatchResponse:
+    """Validate every pick against one catalogue snapshot, check stage limits for the combined set and
+    save the accepted picks in one transaction. Raises IntegrityError if a concurrent request inserted
+    one of these bids first (the transaction is rolled back)."""
+    matches = get_matches_by_ids(db, [i.match_id for i in items])
+    errors: dict[int, str] = {}
+    reasons: dict[int, str] = {}  # match_id -> bids_rejected reason
+    for item in items:
+        match = matches.get(item.match_id)
+        if not match:
+            errors[item.match_id], reasons[item.match_id] = "Match not found", "not_found"
+        elif match["is_locked"]:
+            errors[item.match_id], reasons[item.match_id] = "Match has started. Bidding is closed.", "locked"
+        elif item.selected_team_id not in (match["team1"]["id"], match["team2"]["id"]):
+            errors[item.match_id], reasons[item.match_id] = "Invalid team selection", "invalid_team"
+
+    valid_ids = [i.match_id for i in items if i.match_id not in errors]
+    existing = {
+        b.match_id: b
+        for b in db.query(Bid).filter(Bid.user_id == user_id, Bid.match_id.in_(valid_ids))
+    } if valid_ids else {}
+
+    usage = get_stage_usage(db, user_id) if len(existing) < len(valid_ids) else {}
+    saved: dict[int, Bid] = {}
+    new_bids = []
+    for item in items:
+        if item.match_id in errors:
+            continue
+        bid = existing.get(item.match_id)
+        if bid is not None and bid.bid_status == MISSED_STATUS:
+            errors[item.match_id], reasons[item.match_id] = "Match has started. Bidding is closed.", "locked"
+            continue
+        if bid is None:
+            mtype = matches[item.match_id]["match_type"]
+            limit = _get_bid_limit(mtype)
+            if usage.get(mtype, 0) >= limit:
+                errors[item.match_id] = f"You have reached the bid limit ({limit}) for {mtype} matches"
+                reasons[item.match_id] = "limit"
+                continue
+            usage[mtype] = usage.get(mtype, 0) + 1
+            bid = Bid(user_id=user_id, match_id=item.match_id)
+            new_bids.append(bid)
+        bid.selected_team_id = item.selected_team_id
+        bid.bid_status = "placed"
+        saved[item.match_id] = bid
+
+    db.add_all(new_bids)
+    if new_bids:
+        db.query(User).filter(User.id == user_id).update(
+            {User.total_bids: func.coalesce(User.total_bids, 0) + len(new_bids)}, synchronize_session=False
+        )
+    db.commit()
+    for reason in reasons.values():
+        bids_rejected.inc(reason)
+    for match_id, bid in saved.items():
+        (bids_placed if bid in new_bids else bids_changed).inc(matches[match_id]["match_type"])
+
+    if saved:  # reload ids/created_at for all saved bids in one query
+        db.query(Bid).filter(Bid.user_id == user_id, Bid.match_id.in_(list(saved))).all()
+    results = []
+    for item in items:
+        bid = saved.get(item.match_id)
+        results.append(BidBatchItemResult(
+            match_id=item.match_id,
+            selected_team_id=item.selected_team_id,
+            ok=bid is not None,
+            error=errors.get(item.match_id),
+            bid=BidResponse.model_validate(bid) if bid is not None else None,
+        ))
+    return BidBatchResponse(
+        placed=len(new_bids),
+        updated=len(saved) - len(new_bids),
+        rejected=len(errors),
+        results=results,
+    )
+
+
+@router.post("/batch", response_model=BidBatchResponse)
+def place_bid_batch(
+    data: BidBatch,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> BidBatchResponse:
+    """Place or change several picks at once (e.g. a double-header day). Each pick is validated like
+    POST /bids/; rejected picks are reported per item and the rest are saved together."""
+    if not data.bids:
+        raise HTTPException(status_code=400, detail="No bids in batch")
+    if len(data.bids) > BID_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BID_BATCH_MAX} bids per batch")
+    if len({b.match_id for b in data.bids}) != len(data.bids):
+        raise HTTPException(status_code=400, detail="Duplicate match_id in bids")
+    try:
+        result = _place_bid_batch(db, current_user.id, data.bids)
+    except IntegrityError:
+        # A concurrent request inserted one of these bids first: retry, which now sees it as existing
+        db.rollback()
+        result = _place_bid_batch(db, current_user.id, data.bids)
+    if result.placed:
+        leaderboard.refresh_users(db, [current_user.id])  # total_bids changed
+    for item in result.results:
+        if item.ok:
+            _bid_written(db, item.match_id)
+    return result
+
+
+# Read helpers shared with routers/async_reads.py
+BID_STATUSES = ("pending", "placed", "missed", "won", "lost", "no_result")
+MATCH_TYPES = ("league", "semi", "final")
+
+
+def _encode_cursor(bid: Bid) -> str:
+    raw = f"{bid.created_at.isoformat()}|{bid.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, bid_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(bid_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _history_params(cursor: str | None, bid_status: str | None, match_type: str | None) -> tuple[datetime, int] | None:
+    """Validate /bids/my query parameters; returns the decoded cursor."""
+    if bid_status is not None and bid_status not in BID_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(BID_STATUSES)}")
+    if match_type is not None and match_type not in MATCH_TYPES:
+        raise HTTPException(status_code=400, detail=f"match_type must be one of {', '.join(MATCH_TYPES)}")
+    return _decode_cursor(cursor) if cursor else None
+
+
+def _my_bids(
+    db: Session,
+    user_id: int,
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+    series: str | None = None,
+    bid_status: str | None = None,
+    match_type: str | None = None,
+) -> tuple[list[BidResponse], str | None]:
+    """One page of the user's bids, newest first, and the cursor for the next page (None on the last).
+
+    Keyset pagination on (created_at, id): each page is a range scan of ix_bids_user_created_id.
+    Series/match type filters resolve to match ids from the catalogue.
+    """
+    q = db.query(Bid).filter(Bid.user_id == user_id)
+    if series or match_type:
+        match_ids = get_match_ids(db, series=series, match_type=match_type)
+        if not match_ids:
+            return [], None
+        q = q.filter(Bid.match_id.in_(match_ids))
+    if bid_status:
+        q = q.filter(Bid.bid_status == bid_status)
+    if after:
+        created_at, bid_id = after
+        q = q.filter(or_(Bid.created_at < created_at, and_(Bid.created_at == created_at, Bid.id < bid_id)))
+    bids = q.order_by(Bid.created_at.desc(), Bid.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(bids[limit - 1]) if len(bids) > limit else None
+    return [BidResponse.model_validate(b) for b in bids[:limit]], next_cursor
+
+
+def _my_bid_for_match(db: Session, user_id: int, match_id: int) -> dict:
+    bid = db.query(Bid).filter(
+        Bid.user_id == user_id,
+        Bid.match_id == match_id
+    ).first()
+    if not bid:
+        return {"has_bid": False, "bid": None}
+    return {"has_bid": True, "bid": BidResponse.model_validate(bid)}
+
+
+MAX_MATCH_IDS = 200  # per /bids/for-matches request
+
+
+def _parse_match_ids(match_ids: str | None) -> list[int] | None:
+    if match_ids is None:
+        return None
+    try:
+        ids = sorted({int(i) for i in match_ids.split(",") if i.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="match_ids must be comma-separated integers")
+    if len(ids) > MAX_MATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MATCH_IDS} match_ids per request")
+    return ids
+
+
+def _my_bids_for_matches(
+    db: Session, user_id: int, match_ids: list[int] | None, series: str | None, match_date: str | None
+) -> list[BidResponse]:
+    """The user's bids on the given matches (or on the series/date's matches): one uq_bids_user_match lookup.
+    At least one filter is required; the full history is paginated by /bids/my."""
+    if match_ids is None and not (series or match_date):
+        raise HTTPException(status_code=400, detail="Give match_ids, series or date")
+    if match_ids is None:
+        match_ids = get_match_ids(db, series=series, match_date=match_date)
+    if not match_ids:
+        return []
+    q = db.query(Bid).filter(Bid.user_id == user_id, Bid.match_id.in_(match_ids))
+    return [BidResponse.model_validate(b) for b in q.order_by(Bid.match_id)]
+
+
 @router.get("/my", response_model=list[BidResponse])
 def my_bids(
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+    series: str | None = Query(None),
+    bid_status: str | None = Query(None, alias="status"),
+    match_type: str | None = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """The caller's bids, newest first. When more remain, X-Next-Cursor holds the cursor for the next page."""
+    after = _history_params(cursor, bid_status, match_type)
+    bids, next_cursor = _my_bids(db, current_user.id, limit, after, series, bid_status, match_type)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return bids
+
+
+@router.get("/for-matches", response_model=list[BidResponse])
+def get_my_bids_for_matches(
+    match_ids: str | None = Query(None, description="Comma-separated match ids"),
+    series: str | None = Query(None),
+    match_date: str | None = Query(None, alias="date", description="YYYY-MM-DD"),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    bids = db.query(Bid).filter(Bid.user_id == current_user.id).order_by(Bid.created_at.desc()).all()
-    return [BidResponse.model_validate(b) for b in bids]
+    """The caller's bids for a list of matches (or a series/date), so a match list needs one request
+    instead of one /for-match call per card. Matches without a bid are simply absent."""
+    return _my_bids_for_matches(db, current_user.id, _parse_match_ids(match_ids), series, match_date)
 
 
 @router.get("/for-match/{match_id}")
 def get_my_bid_for_match(
     match_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    bid = db.query(Bid).filter(
-        Bid.user_id == current_user.id,
-        Bid.match_id == match_id
-    ).first()
-    if not bid:
-        return {"has_bid": False, "bid": None}
-    return {"has_bid": True, "bid": BidResponse.model_validate(bid)}
+    return _my_bid_for_match(db, current_user.id, match_id)
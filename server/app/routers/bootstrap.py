@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+
+from ..auth import Principal, get_current_user, load_user
+from ..conditional import set_server_time
+from ..database import get_db
+from ..match_list_cache import dumps, today_list_and_teams
+from ..schemas import BootstrapResponse
+from .users import _bid_stats, _dashboard_stats, _user_response
+
+router = APIRouter()
+
+
+@router.get("/bootstrap", response_model=BootstrapResponse)
+def bootstrap(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Home-screen state in one round trip: /users/me, /users/dashboard-stats, /users/bid-stats,
+    /matches/today and /matches/teams, from one session (three aggregate queries plus the catalogue).
+    Today's matches and the teams come from one catalogue snapshot; the matches are the cached
+    /matches/today bytes (match_list_cache.py), spliced in rather than re-validated."""
+    user = load_user(db, current_user)
+    today_matches, teams = today_list_and_teams(db)
+    rest = BootstrapResponse(
+        user=_user_response(user),
+        dashboard_stats=_dashboard_stats(db, user),
+        bid_stats=_bid_stats(db, user.id),
+        today_matches=[],
+        teams=teams,
+    ).model_dump(mode="json", exclude={"today_matches"})
+    body = dumps(rest)[:-1] + b',"today_matches":' + today_matches + b"}"
+    response = Response(content=body, media_type="application/json")
+    set_server_time(response)  # For the today_matches countdowns
+    return response
@@ -1,35 +1,98 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models import Team, Bid, User, MatchResult
-from ..schemas import MatchResponse, TeamResponse, MatchBidBreakdown, BidderInfo
-from ..auth import get_current_user
-from ..match_service import get_matches, get_match_by_id, get_today_str
+from ..database import SessionLocal, get_db
+from ..models import Bid, User
+from ..schemas import MatchResponse, TeamResponse, MatchBidBreakdown, BidderInfo, BidderPage, MatchBidSummary, TeamBidSummary
+from ..auth import get_current_user, get_current_user_from_query
+from ..match_service import get_match_by_id, get_teams, get_today_str
+from ..events import broadcaster
+from ..bid_service import get_bidders, team_counts_cache
+from ..settlement import get_bid_amount
+from ..conditional import is_not_modified, not_modified, set_etag, set_server_time
+from ..match_list_cache import cached_match_list_body, match_list_body
 
 router = APIRouter()
 
 
+def _match_list_bytes(db: Session, series: str | None = None, today_only: bool = False) -> tuple[str, bytes]:
+    """(ETag, pre-serialized JSON) for the match list endpoints. Shared with routers/async_reads.py."""
+    if today_only:
+        today = get_today_str()
+        return match_list_body(db, None, today, today)
+    return match_list_body(db, series)
+
+
+def _cached_match_list_bytes(series: str | None = None, today_only: bool = False) -> tuple[str, bytes] | None:
+    """_match_list_bytes from memory only; None when the DB must be read first."""
+    if today_only:
+        today = get_today_str()
+        return cached_match_list_body(None, today, today)
+    return cached_match_list_body(series)
+
+
+def _load_match_list_bytes(series: str | None, today_only: bool) -> tuple[str, bytes]:
+    db = SessionLocal()
+    try:
+        return _match_list_bytes(db, series, today_only)
+    finally:
+        db.close()
+
+
+def _match_list_response(request: Request, etag: str, body: bytes) -> Response:
+    """Conditional GET over the cached bytes; bypasses response_model serialization (already MatchResponse)."""
+    if is_not_modified(request, etag):
+        response = not_modified(etag)
+    else:
+        response = Response(content=body, media_type="application/json")
+        set_etag(response, etag)
+    set_server_time(response)
+    return response
+
+
+# Async so a cache hit is answered on the event loop; only a (re)load goes to the threadpool with a session
 @router.get("/", response_model=list[MatchResponse])
-def list_matches(
+async def list_matches(
+    request: Request,
     series: str | None = Query(None, description="Filter by series: ipl, worldcup, etc."),
-    db: Session = Depends(get_db),
 ):
-    matches = get_matches(db, series)
-    return [MatchResponse.model_validate(m) for m in matches]
+    hit = _cached_match_list_bytes(series)
+    etag, body = hit or await run_in_threadpool(_load_match_list_bytes, series, False)
+    return _match_list_response(request, etag, body)
 
 
 @router.get("/today", response_model=list[MatchResponse])
-def list_today_matches(db: Session = Depends(get_db)):
-    today = get_today_str()
-    matches = [m for m in get_matches(db) if m["match_date"] == today]
-    return [MatchResponse.model_validate(m) for m in matches]
+async def list_today_matches(request: Request):
+    hit = _cached_match_list_bytes(today_only=True)
+    etag, body = hit or await run_in_threadpool(_load_match_list_bytes, None, True)
+    return _match_list_response(request, etag, body)
+
+
+@router.get("/stream")
+async def stream_match_events(_=Depends(get_current_user_from_query)):
+    """Server-sent events: match_locked, result_confirmed and bid_counts (see events.py).
+    bid_counts are only visible to logged-in users: pass a token from POST /auth/stream-token in
+    ?access_token= (never the login token, which would end up in access logs)."""
+    return StreamingResponse(
+        broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/teams", response_model=list[TeamResponse])
 def list_teams(db: Session = Depends(get_db)):
-    return db.query(Team).all()
+    return get_teams(db)
+
+
+def _match_or_404(db: Session, match_id: int) -> dict:
+    match = get_match_by_id(db, match_id)
+    if not match:
+        raise HTTPException(status_code=404, detail="Match not found")
+    return match
 
 
 @router.get("/{match_id}/bid-breakdown", response_model=MatchBidBreakdown)
@@ -38,26 +101,68 @@ def get_match_bid_breakdown(
     db: Session = Depends(get_db),
     _=Depends(get_current_user)
 ):
-    match = get_match_by_id(db, match_id)
-    if not match:
-        raise HTTPException(status_code=404, detail="Match not found")
-    result = db.query(MatchResult).filter(MatchResult.match_id == match_id).first()
-    winner_team_id = result.winner_team_id if result else None
-    bids = db.query(Bid).filter(Bid.match_id == match_id).all()
-    users = {u.id: u for u in db.query(User).filter(User.id.in_({b.user_id for b in bids})).all()}
+    """Full bidder lists for both teams. Prefer /bid-breakdown/summary plus /bid-breakdown/bidders."""
+    match = _match_or_404(db, match_id)
     team1_id, team2_id = match["team1"]["id"], match["team2"]["id"]
-    team1_bidders = []
-    team2_bidders = []
-    for b in bids:
-        if not b.selected_team_id:
-            continue
-        info = BidderInfo(username=users[b.user_id].username, bid_status=b.bid_status)
-        if b.selected_team_id == team1_id:
-            team1_bidders.append(info)
-        else:
-            team2_bidders.append(info)
+    rows = (
+        db.query(Bid.selected_team_id, User.username, Bid.bid_status)
+        .join(User, User.id == Bid.user_id)
+        .filter(Bid.match_id == match_id, Bid.selected_team_id.in_((team1_id, team2_id)))
+        .order_by(Bid.created_at, Bid.id)
+        .all()
+    )
     return MatchBidBreakdown(
-        team1_bidders=team1_bidders,
-        team2_bidders=team2_bidders,
-        winner_team_id=winner_team_id,
+        team1_bidders=[BidderInfo(username=u, bid_status=s) for t, u, s in rows if t == team1_id],
+        team2_bidders=[BidderInfo(username=u, bid_status=s) for t, u, s in rows if t == team2_id],
+        winner_team_id=match["winner_team_id"],
+    )
+
+
+@router.get("/{match_id}/bid-breakdown/summary", response_model=MatchBidSummary)
+def get_match_bid_summary(
+    match_id: int,
+    db: Session = Depends(get_db),
+    _=Depends(get_current_user)
+):
+    """Bidders per team and what each side would win, from cached per-match counts."""
+    match = _match_or_404(db, match_id)
+    counts = team_counts_cache.get(db, match_id)
+    bid_amount = get_bid_amount(match["match_type"])
+    team_ids = (match["team1"]["id"], match["team2"]["id"])
+    teams = []
+    for team_id, other_id in (team_ids, team_ids[::-1]):
+        bidders = counts.get(team_id, 0)
+        pot = counts.get(other_id, 0) * bid_amount
+        teams.append(TeamBidSummary(
+            team_id=team_id, bidders=bidders, pot_if_wins=pot, share_if_wins=pot // bidders if bidders else 0
+        ))
+    return MatchBidSummary(
+        match_id=match_id,
+        bid_amount=bid_amount,
+        total_bidders=sum(counts.get(t, 0) for t in team_ids),
+        teams=teams,
+        winner_team_id=match["winner_team_id"],
+    )
+
+
+@router.get("/{match_id}/bid-breakdown/bidders", response_model=BidderPage)
+def get_match_bidders(
+    match_id: int,
+    team_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    _=Depends(get_current_user)
+):
+    """One page of a team's bidders on a match, in bid order."""
+    match = _match_or_404(db, match_id)
+    if team_id not in (match["team1"]["id"], match["team2"]["id"]):
+        raise HTTPException(status_code=400, detail="Team is not playing this match")
+    rows = get_bidders(db, match_id, team_id, offset, limit)
+    return BidderPage(
+        match_id=match_id,
+        team_id=team_id,
+        total=team_counts_cache.get(db, match_id).get(team_id, 0),
+        offset=offset,
+        bidders=[BidderInfo(username=u, bid_status=s) for u, s in rows],
     )
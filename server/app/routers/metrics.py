@@ -0,0 +1,88 @@
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, Response
+
+from ..auth import principal_cache
+from ..bid_service import team_counts_cache
+from ..catalogue import catalogue
+from ..config import settings
+from ..database import pool_metrics
+from ..events import broadcaster
+from ..hashing import hashing_pool
+from ..match_list_cache import match_list_cache
+from ..metrics import CONTENT_TYPE, registry
+from ..scheduler import lock_scheduler
+from ..settlement_jobs import settlement_worker
+
+router = APIRouter()
+
+
+@registry.collector
+def _db_pool():
+    pool = pool_metrics()
+    out = [
+        ("tvsbids_db_pool_checkouts_total", "counter", "Connections checked out of the pool", pool["checkouts"]),
+        ("tvsbids_db_pool_timeouts_total", "counter", "Checkouts that hit DB_POOL_TIMEOUT_SECONDS", pool["timeouts"]),
+        ("tvsbids_db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection",
+         pool["wait_seconds_total"]),
+        ("tvsbids_db_pool_wait_seconds_max", "gauge", "Longest single checkout wait", pool["wait_seconds_max"]),
+    ]
+    if "size" in pool:
+        out += [
+            ("tvsbids_db_pool_size", "gauge", "Configured pool size", pool["size"]),
+            ("tvsbids_db_pool_checked_out", "gauge", "Connections currently in use", pool["checked_out"]),
+            ("tvsbids_db_pool_overflow", "gauge", "Overflow connections currently open", pool["overflow"]),
+        ]
+    return out
+
+
+@registry.collector
+def _caches():
+    caches = {
+        "catalogue": catalogue.stats(),
+        "principal": principal_cache.stats(),
+        "bid_counts": team_counts_cache.stats(),
+        "match_list": match_list_cache.stats(),
+    }
+    return [
+        ("tvsbids_cache_hits_total", "counter", "Cache lookups served from memory",
+         {(("cache", name),): s["hits"] for name, s in caches.items()}),
+        ("tvsbids_cache_misses_total", "counter", "Cache lookups that went to the database",
+         {(("cache", name),): s["misses"] for name, s in caches.items()}),
+        ("tvsbids_cache_hit_ratio", "gauge", "hits / (hits + misses) since start",
+         {(("cache", name),): s["hit_ratio"] for name, s in caches.items()}),
+    ]
+
+
+@registry.collector
+def _hashing_and_streams():
+    h = hashing_pool.stats()
+    return [
+        ("tvsbids_hashing_running", "gauge", "Password hashes running", h["running"]),
+        ("tvsbids_hashing_queue_depth", "gauge", "Password hashes waiting for a worker", h["queue_depth"]),
+        ("tvsbids_hashing_completed_total", "counter", "Password hashes completed", h["completed"]),
+        ("tvsbids_hashing_rejected_total", "counter", "Logins/registrations refused with 503 (pool full)",
+         h["rejected"]),
+        ("tvsbids_sse_subscribers", "gauge", "Connected /matches/stream clients", broadcaster.subscriber_count),
+        ("tvsbids_sse_events_published_total", "counter", "Live events published", broadcaster.published),
+        ("tvsbids_sse_subscribers_dropped_total", "counter", "Slow stream clients dropped", broadcaster.dropped),
+        ("tvsbids_scheduler_matches_locked_total", "counter", "Matches marked live by this worker's scheduler",
+         lock_scheduler.locked),
+        ("tvsbids_scheduler_missed_bids_total", "counter", "Missed bids recorded by this worker's scheduler",
+         lock_scheduler.missed_bids),
+        ("tvsbids_settlement_jobs_completed_total", "counter", "Settlement jobs completed by this worker",
+         settlement_worker.completed),
+        ("tvsbids_settlement_jobs_failed_total", "counter", "Settlement jobs failed by this worker",
+         settlement_worker.failed),
+    ]
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(authorization: str | None = Header(None)):
+    """Prometheus text format. Requires `Authorization: Bearer <METRICS_TOKEN>`; with no token configured
+    the endpoint always answers 401, so it is never public by default."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=401, detail="Metrics are disabled until METRICS_TOKEN is set")
+    if not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,21 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+import codecs
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..models import User, Bid, MatchResult
-from ..match_service import get_match_type, get_match_by_id, get_match_team_ids
-from ..schemas import UserResponse, UserBidStats, UserDashboardStats, LeaderboardEntry, UserListEntry, UserDeactivate, MatchSetResult
-from ..auth import get_current_user
+from ..models import User, Bid, SettlementJob
+from ..match_service import get_results, invalidate_matches
+from ..settlement import OPEN_BID_STATUSES, SettlementError, get_bid_amount
+from ..settlement_jobs import enqueue, job_status
+from ..bid_service import get_stage_usage
+from ..schemas import UserResponse, UserBidStats, UserDashboardStats, LeaderboardEntry, LeaderboardAround, UserListEntry, UserDeactivate, MatchSetResult, MatchResultBatch
+from ..auth import Principal, get_current_user, invalidate_principal, load_user
+from ..importer import FORMATS, KINDS, Importer, LineParser
 from ..config import settings
+from ..conditional import is_not_modified, make_etag, not_modified, set_etag
+from ..leaderboard import LeaderboardRow, leaderboard
 
 
-def _get_bid_amount(match_type: str) -> int:
-    if match_type == "semi":
-        return getattr(settings, 'BID_AMOUNT_SEMI', 100)
-    if match_type == "final":
-        return getattr(settings, 'BID_AMOUNT_FINAL', 200)
-    return getattr(settings, 'BID_AMOUNT_LEAGUE', 50)
-
 router = APIRouter()
 
 
@@ -26,39 +29,29 @@ def _user_response(user: User) -> UserResponse:
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
-    return _user_response(current_user)
+def get_me(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    return _user_response(load_user(db, current_user))
 
 
-@router.get("/dashboard-stats", response_model=UserDashboardStats)
-def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    db.refresh(current_user)  # Ensure cached stats are current
-    total = current_user.total_bids or 0
-    wins = current_user.wins or 0
-    losses = current_user.losses or 0
+# Stats helpers shared with routers/bootstrap.py
+def _dashboard_stats(db: Session, user: User) -> UserDashboardStats:
     # Pending = bids not yet settled (placed, pending); no_result counts as settled
-    bids = db.query(Bid).filter(Bid.user_id == current_user.id).all()
-    pending = sum(1 for b in bids if b.bid_status in ("placed", "pending"))
+    pending = db.query(func.count(Bid.id)).filter(
+        Bid.user_id == user.id, Bid.bid_status.in_(OPEN_BID_STATUSES)
+    ).scalar()
     return UserDashboardStats(
-        total_matches=total,
-        wins=wins,
-        losses=losses,
-        pending=pending,
+        total_matches=user.total_bids or 0,  # Cached stats columns
+        wins=user.wins or 0,
+        losses=user.losses or 0,
+        pending=pending or 0,
     )
 
 
-@router.get("/bid-stats", response_model=UserBidStats)
-def get_bid_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    bids = db.query(Bid).filter(Bid.user_id == current_user.id).all()
-    league_used = sum(1 for b in bids if get_match_type(db, b.match_id) == "league")
-    semi_used = sum(1 for b in bids if get_match_type(db, b.match_id) == "semi")
-    final_used = sum(1 for b in bids if get_match_type(db, b.match_id) == "final")
+def _bid_stats(db: Session, user_id: int) -> UserBidStats:
+    usage = get_stage_usage(db, user_id)
+    league_used = usage["league"]
+    semi_used = usage["semi"]
+    final_used = usage["final"]
 
     return UserBidStats(
         league_used=league_used,
@@ -73,43 +66,82 @@ def get_bid_stats(
     )
 
 
+@router.get("/dashboard-stats", response_model=UserDashboardStats)
+def get_dashboard_stats(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return _dashboard_stats(db, load_user(db, current_user))
+
+
+@router.get("/bid-stats", response_model=UserBidStats)
+def get_bid_stats(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return _bid_stats(db, current_user.id)
+
+
+def _leaderboard_entry(rank: int, row: LeaderboardRow) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        rank=rank,
+        username=row.username,
+        wins=row.wins,
+        losses=row.losses,
+        total=row.total,
+        amount_won=row.amount_won,
+    )
+
+
+def _leaderboard_page(db: Session, offset: int, limit: int | None) -> tuple[str, list[LeaderboardEntry]]:
+    """(ETag, entries) for a leaderboard page. Shared with routers/async_reads.py."""
+    etag = make_etag("lb", leaderboard.version(db), offset, limit)
+    return etag, [_leaderboard_entry(rank, row) for rank, row in leaderboard.page(db, offset, limit)]
+
+
+def _leaderboard_response(request: Request, response: Response, etag: str, entries: list[LeaderboardEntry]):
+    if is_not_modified(request, etag):
+        return not_modified(etag, "private, no-cache")
+    set_etag(response, etag, "private, no-cache")
+    return entries
+
+
 @router.get("/leaderboard", response_model=list[LeaderboardEntry])
 def get_leaderboard(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1, le=500, description="Page size; omit for the full board"),
     db: Session = Depends(get_db),
     _=Depends(get_current_user)
 ):
-    """Leaderboard: users ranked by net amount (Rs). Admin users excluded. Uses cached stats."""
-    users = db.query(User).filter(User.is_active == 1).all()
-    admin_set = set(settings.admin_usernames_list)
-    users = [u for u in users if u.username.lower() not in admin_set]
-    rows = []
-    for u in users:
-        total = u.total_bids or 0
-        wins = u.wins or 0
-        losses = u.losses or 0
-        amount_won = u.amount_won or 0
-        rows.append({"user": u, "wins": wins, "losses": losses, "total": total, "amount_won": amount_won})
-    rows.sort(key=lambda x: (-x["amount_won"], -x["wins"]))
-    return [
-        LeaderboardEntry(
-            rank=i + 1,
-            username=r["user"].username,
-            wins=r["wins"],
-            losses=r["losses"],
-            total=r["total"],
-            amount_won=r["amount_won"],
-        )
-        for i, r in enumerate(rows)
-    ]
+    """Leaderboard: users ranked by net amount (Rs). Admin users excluded. Served from the materialized board."""
+    etag, entries = _leaderboard_page(db, offset, limit)
+    return _leaderboard_response(request, response, etag, entries)
+
+
+@router.get("/leaderboard/me", response_model=LeaderboardAround)
+def get_my_leaderboard_position(
+    neighbours: int = Query(2, ge=0, le=50, description="Players shown above and below you"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """The caller's rank with the players around it. rank is null for unranked (e.g. admin) users."""
+    rank, rows = leaderboard.around(db, current_user.id, neighbours)
+    return LeaderboardAround(
+        rank=rank,
+        total_players=leaderboard.size(db),
+        entries=[_leaderboard_entry(r, row) for r, row in rows],
+    )
 
 
 @router.get("/admin/users", response_model=list[UserListEntry])
 def admin_list_users(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """List all users. Admin only."""
-    if current_user.username.lower() not in settings.admin_usernames_list:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     users = db.query(User).order_by(User.created_at.desc()).all()
     return [
@@ -125,69 +157,139 @@ def admin_list_users(
 
 
 @router.get("/admin/match-results")
-def admin_get_match_results(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def admin_get_match_results(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Get match results status for admin. Returns matches with result status and bid amounts."""
-    if current_user.username.lower() not in settings.admin_usernames_list:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
-    results = {r.match_id: r.winner_team_id for r in db.query(MatchResult).all()}
+    results = get_results(db)
     return {
         "results": results,
         "bid_amounts": {
-            "league": _get_bid_amount("league"),
-            "semi": _get_bid_amount("semi"),
-            "final": _get_bid_amount("final"),
+            "league": get_bid_amount("league"),
+            "semi": get_bid_amount("semi"),
+            "final": get_bid_amount("final"),
         },
     }
 
 
-@router.post("/admin/match-results/{match_id}/confirm")
+def _enqueue_or_raise(db: Session, results: dict[int, int | None]) -> dict:
+    try:
+        job = enqueue(db, results)
+    except SettlementError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {"ok": True, **job_status(job)}
+
+
+@router.post("/admin/match-results/{match_id}/confirm", status_code=202)
 def admin_confirm_match_result(
     match_id: int,
     data: MatchSetResult,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Admin confirms match result. winner_team_id=None means rain/no result (no deduction)."""
-    if current_user.username.lower() not in settings.admin_usernames_list:
+    """Admin confirms match result. winner_team_id=None means rain/no result (no deduction).
+    Queues a settlement job and returns it; poll GET /admin/settlement-jobs/{job_id}. Retries return the same job."""
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
-    match = get_match_by_id(db, match_id)
-    if not match:
-        raise HTTPException(status_code=404, detail="Match not found")
-    # Check already confirmed
-    existing = db.query(MatchResult).filter(MatchResult.match_id == match_id).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Match result already confirmed")
-    team1_id, team2_id = match["team1"]["id"], match["team2"]["id"]
-    winner_team_id = data.winner_team_id
-    if winner_team_id is not None and winner_team_id not in (team1_id, team2_id):
-        raise HTTPException(status_code=400, detail="Winner must be one of the playing teams")
-    bids = db.query(Bid).filter(Bid.match_id == match_id, Bid.selected_team_id.isnot(None)).all()
-    match_type = match.get("match_type", "league")
-    bid_amount = _get_bid_amount(match_type)
-    if winner_team_id is None:
-        # Rain dispute: no amount deducted
-        for b in bids:
-            b.bid_status = "no_result"
-            b.amount_won = 0
-    else:
-        winners = [b for b in bids if b.selected_team_id == winner_team_id]
-        losers = [b for b in bids if b.selected_team_id != winner_team_id]
-        # Total from losers = number of losers × bid_amount; each winner gets pot / num_winners
-        pot = len(losers) * bid_amount
-        share = pot // len(winners) if winners else 0
-        for b in losers:
-            b.bid_status = "lost"
-            b.amount_won = -bid_amount
-            b.user.losses = (b.user.losses or 0) + 1
-            b.user.amount_won = (b.user.amount_won or 0) - bid_amount
-        for b in winners:
-            b.bid_status = "won"
-            b.amount_won = share
-            b.user.wins = (b.user.wins or 0) + 1
-            b.user.amount_won = (b.user.amount_won or 0) + share
-    db.add(MatchResult(match_id=match_id, winner_team_id=winner_team_id))
-    db.commit()
-    return {"ok": True, "match_id": match_id, "winner_team_id": winner_team_id}
+    return _enqueue_or_raise(db, {match_id: data.winner_team_id})
+
+
+@router.post("/admin/match-results/confirm", status_code=202)
+def admin_confirm_match_results(
+    data: MatchResultBatch,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Confirm several match results as one settlement job (one transaction, all or nothing). Admin only."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    results = {r.match_id: r.winner_team_id for r in data.results}
+    if len(results) != len(data.results):
+        raise HTTPException(status_code=400, detail="Duplicate match_id in results")
+    if not results:
+        raise HTTPException(status_code=400, detail="No results given")
+    return _enqueue_or_raise(db, results)
+
+
+@router.get("/admin/settlement-jobs/{job_id}")
+def admin_get_settlement_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Settlement job status: queued, running, finishing (settled, refreshing caches), done or failed (see error).
+    Once settled, results has pot/share/winners/losers per match and totals sums them. Admin only."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    job = db.get(SettlementJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Settlement job not found")
+    return job_status(job)
+
+
+@router.post("/admin/matches/reload")
+def admin_reload_matches(current_user: Principal = Depends(get_current_user)):
+    """Drop the cached match catalogue after matches/teams are uploaded to the DB. Admin only."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    invalidate_matches()
+    return {"ok": True}
+
+
+async def _request_lines(request: Request):
+    """Decode the request body line by line as it arrives."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+@router.post("/admin/import/{kind}")
+async def admin_import(
+    kind: str,
+    request: Request,
+    fmt: str | None = Query(None, alias="format", description="csv or ndjson; defaults from Content-Type"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Bulk upsert teams, matches or users from a streamed CSV (header row) or NDJSON body. Admin only.
+    Invalid rows are skipped and listed in errors by line number; valid rows are imported."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if kind not in KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown import kind; use one of {', '.join(KINDS)}")
+    fmt = fmt or ("ndjson" if "json" in request.headers.get("content-type", "") else "csv")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    parser = LineParser(fmt)
+    importer = await run_in_threadpool(Importer, db, kind)
+    chunk = []
+    async for line in _request_lines(request):
+        parsed = parser.parse(line)
+        if parsed is None:
+            continue
+        chunk.append(parsed)
+        if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+            await run_in_threadpool(importer.import_chunk, chunk)
+            chunk = []
+    parsed = parser.finish()
+    if parsed is not None:
+        chunk.append(parsed)
+    if chunk:
+        await run_in_threadpool(importer.import_chunk, chunk)
+    if kind == "users":
+        for user_id in importer.updated_ids:
+            invalidate_principal(user_id)
+        leaderboard.invalidate()
+    elif importer.report.inserted or importer.report.updated:
+        invalidate_matches()
+    return importer.report.as_dict()
 
 
 @router.patch("/admin/users/{user_id}")
@@ -195,14 +297,16 @@ def admin_set_user_active(
     user_id: int,
     data: UserDeactivate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Deactivate or activate a user. Admin only."""
-    if current_user.username.lower() not in settings.admin_usernames_list:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     user.is_active = 1 if data.is_active else 0
     db.commit()
+    invalidate_principal(user_id)
+    leaderboard.refresh_users(db, [user_id])
     return {"ok": True, "is_active": user.is_active}
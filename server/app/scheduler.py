@@ -0,0 +1,173 @@
+"""Lock-time scheduler: when a match starts, mark it live and record missed bids in bulk.
+
+A min-heap of (start time, match id) for matches still "upcoming" in the DB is loaded at startup and
+every LOCK_SCHEDULER_RELOAD_SECONDS (so uploaded fixtures are picked up). The task sleeps until the
+earliest start, then for each due match, in one transaction:
+  1. UPDATE matches SET status = 'live' WHERE id = :m AND status = 'upcoming' (0 rows: already done)
+  2. INSERT INTO bids ... SELECT one 'missed' bid (no team) for every active, non-admin user who
+     registered before the start and has no bid on the match (NOT EXISTS; uq_bids_user_match guards
+     against a bid racing in).
+Missed bids do not count toward total_bids, stage limits or settlement.
+
+With several workers only the holder of the "lock_scheduler" lease in scheduler_leases does this.
+The lease is taken and renewed with a conditional UPDATE/INSERT (works on SQLite and PostgreSQL) and
+expires after LOCK_SCHEDULER_LEASE_SECONDS, so another worker takes over if the holder dies.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import exists, func, insert, literal, null, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .catalogue import match_tz, start_timestamp
+from .config import settings
+from .data_version import BOOT_ID
+from .database import SessionLocal
+from .match_service import invalidate_matches
+from .models import Bid, Match, MatchStatus, SchedulerLease, User
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "lock_scheduler"
+MISSED_STATUS = "missed"  # bid_status of the rows inserted for users who had not bid at lock time
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{BOOT_ID}"[:100]
+
+
+def acquire_lease(db: Session, name: str, holder: str, ttl_seconds: float) -> bool:
+    """Take or renew the named lease for `holder`. True if it holds the lease until now + ttl."""
+    now = datetime.utcnow()
+    expires = now + timedelta(seconds=ttl_seconds)
+    renewed = db.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == name, or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now))
+        .values(holder=holder, expires_at=expires)
+    ).rowcount
+    if renewed:
+        db.commit()
+        return True
+    try:
+        db.execute(insert(SchedulerLease).values(name=name, holder=holder, expires_at=expires))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()  # Held by another live worker
+        return False
+
+
+def release_lease(db: Session, name: str, holder: str) -> None:
+    db.execute(update(SchedulerLease).where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+               .values(expires_at=datetime.utcnow()))
+    db.commit()
+
+
+def lock_match(db: Session, match_id: int, start_ts: float) -> int | None:
+    """Mark the match live and insert missed bids. Returns the number of missed bids, or None if the
+    match was no longer upcoming (locked by another worker, settled, or edited)."""
+    for attempt in range(2):
+        flipped = db.execute(
+            update(Match)
+            .where(Match.id == match_id, Match.status == MatchStatus.UPCOMING.value)
+            .values(status=MatchStatus.LIVE.value)
+        ).rowcount
+        if not flipped:
+            db.rollback()
+            return None
+        now = datetime.utcnow()
+        started = datetime.utcfromtimestamp(start_ts)
+        missing = select(
+            User.id, literal(match_id), null(), literal(MISSED_STATUS), literal(now), literal(now)
+        ).where(
+            User.is_active == 1,
+            func.lower(User.username).notin_(settings.admin_usernames_list),
+            or_(User.created_at.is_(None), User.created_at <= started),
+            ~exists().where(Bid.user_id == User.id, Bid.match_id == match_id),
+        )
+        try:
+            inserted = db.execute(
+                insert(Bid).from_select(
+                    ["user_id", "match_id", "selected_team_id", "bid_status", "created_at", "updated_at"], missing
+                )
+            ).rowcount
+            db.commit()
+            return inserted
+        except IntegrityError:
+            db.rollback()  # A bid was placed between NOT EXISTS and the insert: retry with it excluded
+            if attempt:
+                raise
+
+
+def _upcoming_heap(db: Session) -> list[tuple[float, int]]:
+    tz = match_tz()
+    rows = db.query(Match.id, Match.match_date, Match.match_time).filter(
+        Match.status == MatchStatus.UPCOMING.value
+    ).all()
+    heap = [(ts, mid) for mid, d, t in rows if (ts := start_timestamp(d, t, tz)) is not None]
+    heapq.heapify(heap)
+    return heap
+
+
+class LockScheduler:
+    def __init__(self, reload_seconds: float, lease_seconds: float):
+        self.reload_seconds = reload_seconds
+        self.lease_seconds = lease_seconds
+        self._heap: list[tuple[float, int]] = []
+        self._loaded_at: float | None = None
+        self.locked = 0
+        self.missed_bids = 0
+
+    def run_once(self, now_ts: float | None = None) -> float:
+        """Lock every due match if this worker holds the lease. Returns seconds until the next run."""
+        db = SessionLocal()
+        try:
+            if not acquire_lease(db, LEASE_NAME, HOLDER, self.lease_seconds):
+                self._loaded_at = None  # Reload when we become leader: the holder changed the DB
+                return self.lease_seconds / 2
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_seconds:
+                self._heap = _upcoming_heap(db)
+                self._loaded_at = time.monotonic()
+            now_ts = now_ts if now_ts is not None else time.time()
+            locked = []
+            while self._heap and self._heap[0][0] <= now_ts:
+                start_ts, match_id = heapq.heappop(self._heap)
+                missed = lock_match(db, match_id, start_ts)
+                if missed is not None:
+                    locked.append(match_id)
+                    self.missed_bids += missed
+                    logger.info("Locked match %s: %s missed bids recorded", match_id, missed)
+            if locked:
+                self.locked += len(locked)
+                invalidate_matches()
+        finally:
+            db.close()
+        delay = min(self.reload_seconds, self.lease_seconds / 3)
+        if self._heap:
+            delay = min(delay, self._heap[0][0] - time.time())
+        return max(delay, 0.05)
+
+    def stop(self) -> None:
+        db = SessionLocal()
+        try:
+            release_lease(db, LEASE_NAME, HOLDER)
+        finally:
+            db.close()
+
+
+lock_scheduler = LockScheduler(settings.LOCK_SCHEDULER_RELOAD_SECONDS, settings.LOCK_SCHEDULER_LEASE_SECONDS)
+
+
+async def run_lock_scheduler() -> None:
+    """Background task (started in main.lifespan when LOCK_SCHEDULER_ENABLED)."""
+    while True:
+        try:
+            delay = await run_in_threadpool(lock_scheduler.run_once)
+        except Exception:
+            logger.exception("Lock scheduler run failed")
+            delay = lock_scheduler.lease_seconds / 3
+        await asyncio.sleep(delay)
@@ -21,6 +21,11 @@ class Token(BaseModel):
     user: "UserResponse"
 
 
+class StreamToken(BaseModel):
+    access_token: str
+    expires_in: int  # Seconds
+
+
 class UserResponse(BaseModel):
     id: int
     username: str
@@ -53,8 +58,8 @@ class MatchResponse(BaseModel):
     series: str = "worldcup"  # ipl, worldcup, etc.
     status: str
     winner_team_id: Optional[int] = None
+    start_ts: Optional[int] = None  # Start as UTC epoch seconds; count down against the X-Server-Time header
     is_locked: bool = False
-    seconds_until_start: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -74,6 +79,15 @@ class MatchSetResult(BaseModel):
     winner_team_id: Optional[int] = None  # None = rain/no result
 
 
+class MatchResultItem(BaseModel):
+    match_id: int
+    winner_team_id: Optional[int] = None  # None = rain/no result
+
+
+class MatchResultBatch(BaseModel):
+    results: List[MatchResultItem]
+
+
 class BidderInfo(BaseModel):
     username: str
     bid_status: str  # placed, won, lost
@@ -85,6 +99,29 @@ class MatchBidBreakdown(BaseModel):
     winner_team_id: Optional[int] = None
 
 
+class TeamBidSummary(BaseModel):
+    team_id: int
+    bidders: int
+    pot_if_wins: int  # Rs lost by the other team's bidders if this team wins
+    share_if_wins: int  # Each of this team's bidders wins pot // bidders
+
+
+class MatchBidSummary(BaseModel):
+    match_id: int
+    bid_amount: int
+    total_bidders: int
+    teams: List[TeamBidSummary]  # team1, team2
+    winner_team_id: Optional[int] = None
+
+
+class BidderPage(BaseModel):
+    match_id: int
+    team_id: int
+    total: int
+    offset: int
+    bidders: List[BidderInfo]
+
+
 # Bids
 class BidCreate(BaseModel):
     match_id: int
@@ -102,6 +139,25 @@ class BidResponse(BaseModel):
         from_attributes = True
 
 
+class BidBatch(BaseModel):
+    bids: List[BidCreate]
+
+
+class BidBatchItemResult(BaseModel):
+    match_id: int
+    selected_team_id: int
+    ok: bool
+    error: Optional[str] = None  # Why this pick was rejected (other picks are still saved)
+    bid: Optional[BidResponse] = None
+
+
+class BidBatchResponse(BaseModel):
+    placed: int  # New bids
+    updated: int  # Existing bids whose team changed
+    rejected: int
+    results: List[BidBatchItemResult]  # Same order as the request
+
+
 # User stats
 class UserBidStats(BaseModel):
     league_used: int
@@ -131,6 +187,12 @@ class LeaderboardEntry(BaseModel):
     amount_won: int = 0  # Net Rs (positive=profit, negative=loss)
 
 
+class LeaderboardAround(BaseModel):
+    rank: Optional[int] = None  # None = caller is not on the board (admin or inactive)
+    total_players: int
+    entries: List[LeaderboardEntry]
+
+
 # Admin
 class UserListEntry(BaseModel):
     id: int
@@ -145,3 +207,11 @@ class UserListEntry(BaseModel):
 
 class UserDeactivate(BaseModel):
     is_active: bool
+
+
+class BootstrapResponse(BaseModel):
+    user: UserResponse
+    dashboard_stats: UserDashboardStats
+    bid_stats: UserBidStats
+    today_matches: List[MatchResponse]
+    teams: List[TeamResponse]
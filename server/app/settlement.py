@@ -0,0 +1,199 @@
+"""Set-based settlement of confirmed match results.
+
+All matches passed to settle_matches are settled in one transaction:
+  1. INSERT the match_results rows first. The primary key on match_id is the settlement lock: a
+     second settlement of the same match (concurrent or retried) fails here before touching bids.
+  2. One GROUP BY over bids gives per-team counts, from which pot and share are computed.
+  3. One UPDATE per match sets bid_status/amount_won on every open bid (CASE on selected team).
+  4. One UPDATE ... FROM a per-user aggregate applies the cached wins/losses/amount_won deltas.
+  5. One UPDATE marks the matches completed.
+Statement count is O(matches), independent of the number of bids.
+"""
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .match_service import get_match_by_id
+from .metrics import settlement_duration, settlements as metrics_settlements
+from .models import Bid, Match, MatchResult, MatchStatus, User
+
+OPEN_BID_STATUSES = ("placed", "pending")
+
+
+class SettlementError(Exception):
+    """Invalid settlement request. status_code is the HTTP status the router should return."""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+@dataclass
+class SettlementResult:
+    match_id: int
+    winner_team_id: int | None
+    bid_amount: int
+    winners: int
+    losers: int
+    no_result: int
+    pot: int
+    share: int
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def get_bid_amount(match_type: str) -> int:
+    if match_type == "semi":
+        return settings.BID_AMOUNT_SEMI
+    if match_type == "final":
+        return settings.BID_AMOUNT_FINAL
+    return settings.BID_AMOUNT_LEAGUE
+
+
+def _validate(db: Session, results: dict[int, int | None]) -> dict[int, dict]:
+    matches = {}
+    for match_id, winner_team_id in results.items():
+        match = get_match_by_id(db, match_id)
+        if not match:
+            raise SettlementError(f"Match {match_id} not found", status_code=404)
+        if winner_team_id is not None and winner_team_id not in (match["team1"]["id"], match["team2"]["id"]):
+            raise SettlementError(f"Match {match_id}: winner must be one of the playing teams")
+        matches[match_id] = match
+    return matches
+
+
+def _team_counts(db: Session, match_ids: list[int]) -> dict[int, dict[int, int]]:
+    """match_id -> {selected_team_id: open bid count}."""
+    rows = (
+        db.query(Bid.match_id, Bid.selected_team_id, func.count(Bid.id))
+        .filter(
+            Bid.match_id.in_(match_ids),
+            Bid.selected_team_id.isnot(None),
+            Bid.bid_status.in_(OPEN_BID_STATUSES),
+        )
+        .group_by(Bid.match_id, Bid.selected_team_id)
+        .all()
+    )
+    counts: dict[int, dict[int, int]] = {m: {} for m in match_ids}
+    for match_id, team_id, count in rows:
+        counts[match_id][team_id] = count
+    return counts
+
+
+def _apply_user_deltas(db: Session, match_ids: list[int]) -> None:
+    """Add won/lost bids of the just-settled matches to the users' cached stats: one UPDATE ... FROM
+    a per-user aggregate of those bids."""
+    deltas = (
+        select(
+            Bid.user_id.label("user_id"),
+            func.sum(case((Bid.bid_status == "won", 1), else_=0)).label("wins"),
+            func.sum(case((Bid.bid_status == "lost", 1), else_=0)).label("losses"),
+            func.sum(Bid.amount_won).label("amount_won"),
+        )
+        .where(Bid.match_id.in_(match_ids), Bid.bid_status.in_(("won", "lost")))
+        .group_by(Bid.user_id)
+        .subquery()
+    )
+    db.execute(
+        update(User)
+        .where(User.id == deltas.c.user_id)
+        .values(
+            wins=func.coalesce(User.wins, 0) + deltas.c.wins,
+            losses=func.coalesce(User.losses, 0) + deltas.c.losses,
+            amount_won=func.coalesce(User.amount_won, 0) + deltas.c.amount_won,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def check_results(db: Session, results: dict[int, int | None]) -> dict[int, dict]:
+    """Raise SettlementError if settle_matches(db, results) would be refused. Returns the matches."""
+    matches = _validate(db, results)
+    match_ids = sorted(results)
+    already = {r for (r,) in db.query(MatchResult.match_id).filter(MatchResult.match_id.in_(match_ids)).all()}
+    if already:
+        raise SettlementError(f"Match result already confirmed: {', '.join(map(str, sorted(already)))}")
+    return matches
+
+
+def settle_matches(db: Session, results: dict[int, int | None], commit: bool = True) -> list[SettlementResult]:
+    """Settle {match_id: winner_team_id} (None = rain/no result) in one transaction and commit.
+    With commit=False the transaction is left open so the caller can record the outcome in it
+    (settlement_jobs.py) and commit or roll back.
+
+    Raises SettlementError if a match is unknown, the winner is not playing, or any of the
+    matches has already been settled; nothing is written in that case.
+    """
+    if not results:
+        return []
+    started = time.perf_counter()
+    matches = check_results(db, results)
+    match_ids = sorted(results)
+    try:
+        db.add_all(MatchResult(match_id=m, winner_team_id=results[m]) for m in match_ids)
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise SettlementError("Match result already confirmed")
+
+    counts = _team_counts(db, match_ids)
+    now = datetime.utcnow()
+    summaries = []
+    any_decided = False
+    for match_id in match_ids:
+        winner_team_id = results[match_id]
+        bid_amount = get_bid_amount(matches[match_id].get("match_type", "league"))
+        open_bids = (
+            Bid.match_id == match_id,
+            Bid.selected_team_id.isnot(None),
+            Bid.bid_status.in_(OPEN_BID_STATUSES),
+        )
+        team_counts = counts[match_id]
+        total = sum(team_counts.values())
+        if winner_team_id is None:
+            # Rain dispute: no amount deducted
+            db.execute(
+                update(Bid).where(*open_bids)
+                .values(bid_status="no_result", amount_won=0, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            summaries.append(SettlementResult(match_id, None, bid_amount, 0, 0, total, 0, 0))
+            continue
+        winners = team_counts.get(winner_team_id, 0)
+        losers = total - winners
+        # Total from losers = number of losers × bid_amount; each winner gets pot / num_winners
+        pot = losers * bid_amount
+        share = pot // winners if winners else 0
+        is_winner = Bid.selected_team_id == winner_team_id
+        db.execute(
+            update(Bid).where(*open_bids)
+            .values(
+                bid_status=case((is_winner, "won"), else_="lost"),
+                amount_won=case((is_winner, share), else_=-bid_amount),
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        any_decided = any_decided or total > 0
+        summaries.append(SettlementResult(match_id, winner_team_id, bid_amount, winners, losers, 0, pot, share))
+
+    if any_decided:
+        _apply_user_deltas(db, match_ids)
+    db.execute(
+        update(Match).where(Match.id.in_(match_ids))
+        .values(status=MatchStatus.COMPLETED.value)
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        db.commit()
+    settlement_duration.observe(time.perf_counter() - started)
+    for summary in summaries:
+        metrics_settlements.inc("decided" if summary.winner_team_id is not None else "no_result")
+    return summaries
@@ -0,0 +1,317 @@
+"""Durable settlement jobs: confirming a result queues a job that an in-process worker thread runs.
+
+The confirm endpoints call enqueue() and return the job at once; GET /users/admin/settlement-jobs/{id}
+reports its progress and, when settled, the pot/share/winners/losers per match.
+
+Idempotency: a job is keyed by its set of match ids. Re-posting the same results returns the existing
+job; a failed job is re-queued. Each match is settled in its own transaction together with the job's
+progress (matches_settled and the summary so far), so a re-run after a crash or error continues with
+the matches not yet in the summary. The move to "finishing" is committed before the cache refreshes
+(invalidate, leaderboard, live event), which are re-run if the worker dies after it; the match_results
+primary key still prevents a second settlement.
+
+Job states: queued -> running -> finishing (settled) -> done, or failed. While a job runs, a heartbeat
+thread refreshes its heartbeat_at every SETTLEMENT_JOB_STALE_SECONDS / 4 (own session, one-row UPDATE).
+A running or finishing job whose heartbeat is older than SETTLEMENT_JOB_STALE_SECONDS (its process died
+or was restarted) is picked up again by any worker. Every worker process runs the loop; claiming is a
+conditional UPDATE.
+"""
+import hashlib
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .events import broadcaster
+from .leaderboard import leaderboard
+from .match_service import invalidate_matches
+from .models import SettlementJob
+from .scheduler import HOLDER
+from .settlement import SettlementError, SettlementResult, check_results, settle_matches
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3  # Runs ending in an unexpected error (e.g. lost DB connection) before the job is failed
+
+
+def _dump_results(results: dict[int, int | None]) -> str:
+    return json.dumps({str(m): results[m] for m in sorted(results)}, separators=(",", ":"))
+
+
+def _load_results(payload: str) -> dict[int, int | None]:
+    return {int(m): w for m, w in json.loads(payload).items()}
+
+
+def _match_key(results: dict[int, int | None]) -> str:
+    return hashlib.sha1(",".join(map(str, sorted(results))).encode()).hexdigest()
+
+
+def enqueue(db: Session, results: dict[int, int | None]) -> SettlementJob:
+    """Queue settlement of {match_id: winner_team_id}, or return the job already queued for it.
+
+    Raises SettlementError for an unknown match, a winner that is not playing, an already confirmed
+    result, or (409) a job for the same matches with a different result. Re-queuing a failed job with
+    the same results keeps the matches it had already settled.
+    """
+    key, payload = _match_key(results), _dump_results(results)
+    job = db.query(SettlementJob).filter(SettlementJob.match_key == key).first()
+    if job is not None and job.status != "failed":
+        if job.results != payload:
+            raise SettlementError("Settlement already requested for these matches with a different result", 409)
+        return job
+    keep = job is not None and job.results == payload and bool(job.summary)  # Failed part way: keep progress
+    settled = {s["match_id"] for s in json.loads(job.summary)} if keep else set()
+    check_results(db, {m: w for m, w in results.items() if m not in settled})
+    if job is None:
+        job = SettlementJob(match_key=key, results=payload, matches_total=len(results))
+        db.add(job)
+    else:  # Failed earlier: run it again with these results
+        job.results, job.status, job.error, job.attempts, job.claimed_by = payload, "queued", None, 0, None
+        if not keep:
+            job.summary, job.matches_settled = None, 0
+        job.started_at = job.finished_at = job.heartbeat_at = None
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # The same request raced us; return its job
+        return enqueue(db, results)
+    settlement_worker.wake()
+    return job
+
+
+def job_status(job: SettlementJob) -> dict:
+    summaries = json.loads(job.summary) if job.summary else []
+    totals = None
+    if summaries:
+        totals = {k: sum(s[k] for s in summaries) for k in ("pot", "winners", "losers", "no_result")}
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "match_ids": sorted(_load_results(job.results)),
+        "matches_total": job.matches_total,
+        "matches_settled": job.matches_settled,
+        "attempts": job.attempts,
+        "error": job.error,
+        "totals": totals,  # Summed over the matches settled so far
+        "results": summaries,  # Per match: winner_team_id, bid_amount, winners, losers, no_result, pot, share
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _after_settlement(db: Session, summaries: list[SettlementResult]) -> None:
+    """Refresh this process's caches and notify live clients. Safe to repeat."""
+    invalidate_matches()
+    leaderboard.refresh_for_matches(db, [s.match_id for s in summaries])
+    for summary in summaries:
+        broadcaster.publish("result_confirmed", {"match_id": summary.match_id, "winner_team_id": summary.winner_team_id})
+
+
+class SettlementWorker:
+    """Background thread that runs queued settlement jobs (started in main.lifespan)."""
+
+    def __init__(self, poll_seconds: float, stale_seconds: float):
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._loop, name="settlement-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop after the current job. A job cut off by the timeout is recovered as stale later."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Settlement worker run failed")
+            self._wake.wait(self.poll_seconds)
+
+    def run_pending(self) -> int:
+        """Run every claimable job (queued, or stale from a dead worker). Returns how many were run."""
+        db = SessionLocal()
+        try:
+            ran = 0
+            while not self._stopping.is_set():
+                job_id = self._claim(db)
+                if job_id is None:
+                    return ran
+                self._run(db, job_id)
+                ran += 1
+            return ran
+        finally:
+            db.close()
+
+    def _owned(self, job_id: int, status: str):
+        """WHERE clause: the job is still ours and in `status` (not taken over after going stale)."""
+        return SettlementJob.id == job_id, SettlementJob.claimed_by == HOLDER, SettlementJob.status == status
+
+    def _claim(self, db: Session) -> int | None:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.stale_seconds)
+        candidates = (
+            db.query(SettlementJob.id, SettlementJob.status)
+            .filter(
+                (SettlementJob.status == "queued")
+                | (SettlementJob.status.in_(("running", "finishing")) & (SettlementJob.heartbeat_at < stale))
+            )
+            .order_by(SettlementJob.id)
+            .limit(10)
+            .all()
+        )
+        for job_id, status in candidates:
+            values = {"claimed_by": HOLDER, "heartbeat_at": now}
+            if status != "finishing":
+                values.update(status="running", started_at=now, attempts=SettlementJob.attempts + 1)
+            claimed = db.execute(
+                update(SettlementJob)
+                .where(SettlementJob.id == job_id, SettlementJob.status == status,
+                       (SettlementJob.status == "queued") | (SettlementJob.heartbeat_at < stale))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            if claimed:
+                return job_id
+        return None
+
+    def _finish(self, db: Session, job_id: int, from_status: str, status: str, error: str | None = None) -> None:
+        db.execute(
+            update(SettlementJob)
+            .where(*self._owned(job_id, from_status))
+            .values(status=status, error=error, finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    @contextmanager
+    def _heartbeat(self, job_id: int):
+        """Keep the job's heartbeat fresh from a separate thread while the body runs."""
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(self.stale_seconds / 4):
+                db = SessionLocal()
+                try:
+                    db.execute(
+                        update(SettlementJob)
+                        .where(SettlementJob.id == job_id, SettlementJob.claimed_by == HOLDER,
+                               SettlementJob.status.in_(("running", "finishing")))
+                        .values(heartbeat_at=datetime.utcnow())
+                        .execution_options(synchronize_session=False)
+                    )
+                    db.commit()
+                except Exception:
+                    logger.warning("Settlement job %s heartbeat failed", job_id, exc_info=True)
+                finally:
+                    db.close()
+
+        thread = threading.Thread(target=beat, name=f"settlement-heartbeat-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join(timeout=5)
+
+    def _run(self, db: Session, job_id: int) -> None:
+        with self._heartbeat(job_id):
+            self._run_job(db, job_id)
+
+    def _run_job(self, db: Session, job_id: int) -> None:
+        job = db.get(SettlementJob, job_id, populate_existing=True)
+        if job.status == "finishing":  # Settled by a worker that died before refreshing caches
+            summaries = [SettlementResult(**s) for s in json.loads(job.summary)]
+            _after_settlement(db, summaries)
+            self._finish(db, job_id, "finishing", "done")
+            return
+        attempts = job.attempts
+        if attempts > MAX_ATTEMPTS:
+            self._fail(db, job_id, f"Settlement failed after {MAX_ATTEMPTS} attempts")
+            return
+        results = _load_results(job.results)
+        summaries = [SettlementResult(**s) for s in json.loads(job.summary)] if job.summary else []
+        for match_id in sorted(set(results) - {s.match_id for s in summaries}):
+            try:
+                summaries += settle_matches(db, {match_id: results[match_id]}, commit=False)
+            except SettlementError as e:
+                db.rollback()
+                self._fail(db, job_id, e.detail)
+                return
+            except Exception:
+                db.rollback()
+                logger.exception("Settlement job %s failed on match %s (attempt %s)", job_id, match_id, attempts)
+                if attempts >= MAX_ATTEMPTS:
+                    self._fail(db, job_id, f"Settlement failed after {MAX_ATTEMPTS} attempts")
+                else:
+                    self._requeue(db, job_id)
+                return
+            if not self._progress(db, job_id, summaries, "running"):
+                return
+        if not self._progress(db, job_id, summaries, "finishing"):
+            return
+        _after_settlement(db, summaries)
+        self._finish(db, job_id, "finishing", "done")
+        self.completed += 1
+
+    def _progress(self, db: Session, job_id: int, summaries: list[SettlementResult], status: str) -> bool:
+        """Record the matches settled so far (and the new status) in the open transaction and commit.
+        False, with everything rolled back, if the job went stale and another worker took it over."""
+        owned = db.execute(
+            update(SettlementJob)
+            .where(*self._owned(job_id, "running"))
+            .values(
+                status=status,
+                matches_settled=len(summaries),
+                summary=json.dumps([s.as_dict() for s in summaries]),
+                heartbeat_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not owned:
+            db.rollback()  # Leave the job to the worker that took it over
+            return False
+        db.commit()
+        return True
+
+    def _fail(self, db: Session, job_id: int, error: str) -> None:
+        self._finish(db, job_id, "running", "failed", error[:500])
+        self.failed += 1
+
+    def _requeue(self, db: Session, job_id: int) -> None:
+        db.execute(
+            update(SettlementJob)
+            .where(*self._owned(job_id, "running"))
+            .values(status="queued", claimed_by=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+settlement_worker = SettlementWorker(settings.SETTLEMENT_JOB_POLL_SECONDS, settings.SETTLEMENT_JOB_STALE_SECONDS)
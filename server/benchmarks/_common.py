@@ -0,0 +1,91 @@
+"""Shared helpers for the benchmark scripts: throwaway SQLite engines, seeding and SQL counting."""
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.match_data import TEAMS_DATA
+from app.models import Team, Match, User
+
+
+def make_engine(url: str = "sqlite://"):
+    """Fresh engine with all tables created. Defaults to an in-memory SQLite database."""
+    engine = create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class QueryCounter:
+    """Counts statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timed():
+    """Yields a dict whose "seconds" key is filled in when the block exits."""
+    out = {}
+    start = time.perf_counter()
+    try:
+        yield out
+    finally:
+        out["seconds"] = time.perf_counter() - start
+
+
+def seed_teams(db) -> list[int]:
+    db.bulk_insert_mappings(Team, [{"id": t[0], "name": t[1], "short_name": t[2]} for t in TEAMS_DATA])
+    db.commit()
+    return [t[0] for t in TEAMS_DATA]
+
+
+def seed_matches(
+    db, count: int, team_ids: list[int], match_type: str = "league", series: str = "worldcup", year: int = 2026
+) -> list[int]:
+    """Insert `count` matches cycling through team pairs, dated in `year`. Returns their ids."""
+    n = len(team_ids)
+    rows = [
+        {
+            "team1_id": team_ids[i % n],
+            "team2_id": team_ids[(i + 1) % n],
+            "match_date": f"{year}-{1 + (i // 28) % 12:02d}-{1 + i % 28:02d}",
+            "match_time": "19:00",
+            "venue": "Bench",
+            "match_type": match_type,
+            "series": series,
+            "status": "upcoming",
+        }
+        for i in range(count)
+    ]
+    first = (db.query(Match.id).order_by(Match.id.desc()).limit(1).scalar() or 0) + 1
+    db.bulk_insert_mappings(Match, rows)
+    db.commit()
+    return list(range(first, first + count))
+
+
+def seed_users(db, count: int, prefix: str = "user") -> list[int]:
+    """Insert `count` users with a dummy password hash. Returns their ids."""
+    first = (db.query(User.id).order_by(User.id.desc()).limit(1).scalar() or 0) + 1
+    db.bulk_insert_mappings(
+        User,
+        [
+            {"username": f"{prefix}{first + i}", "hashed_password": "x", "is_active": 1,
+             "total_bids": 0, "wins": 0, "losses": 0, "amount_won": 0}
+            for i in range(count)
+        ],
+    )
+    db.commit()
+    return list(range(first, first + count))
@@ -0,0 +1,112 @@
+"""Settlement throughput: set-based settle_matches vs the old per-bid ORM loop.
+
+Seeds N bids spread over --matches matches (users = N / matches, everyone bids on every match)
+and settles all matches in one call. The legacy loop only runs up to --legacy-max bids.
+
+    python -m benchmarks.bench_settlement [--sizes 10000,100000,1000000] [--matches 10]
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from sqlalchemy import insert
+
+from app.catalogue import catalogue
+from app.models import Bid, MatchResult, User
+from app.settlement import get_bid_amount, settle_matches
+from benchmarks._common import QueryCounter, make_engine, seed_matches, seed_teams, seed_users, timed
+
+
+def _legacy_settle(db, match_id: int, winner_team_id: int, match_type: str) -> None:
+    """The pre-engine implementation: ORM objects, lazy user loads, one UPDATE per row."""
+    bids = db.query(Bid).filter(Bid.match_id == match_id, Bid.selected_team_id.isnot(None)).all()
+    bid_amount = get_bid_amount(match_type)
+    winners = [b for b in bids if b.selected_team_id == winner_team_id]
+    losers = [b for b in bids if b.selected_team_id != winner_team_id]
+    pot = len(losers) * bid_amount
+    share = pot // len(winners) if winners else 0
+    for b in losers:
+        b.bid_status = "lost"
+        b.amount_won = -bid_amount
+        b.user.losses = (b.user.losses or 0) + 1
+        b.user.amount_won = (b.user.amount_won or 0) - bid_amount
+    for b in winners:
+        b.bid_status = "won"
+        b.amount_won = share
+        b.user.wins = (b.user.wins or 0) + 1
+        b.user.amount_won = (b.user.amount_won or 0) + share
+    db.add(MatchResult(match_id=match_id, winner_team_id=winner_team_id))
+    db.commit()
+
+
+def _seed(directory: str, size: int, match_count: int):
+    engine, Session = make_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    db = Session()
+    team_ids = seed_teams(db)
+    match_ids = seed_matches(db, match_count, team_ids)
+    user_ids = seed_users(db, max(1, size // match_count))
+    rng = random.Random(size)
+    chunk = []
+    for m in match_ids:
+        pair = (team_ids[(m - 1) % len(team_ids)], team_ids[m % len(team_ids)])
+        for u in user_ids:
+            chunk.append({"user_id": u, "match_id": m, "selected_team_id": rng.choice(pair), "bid_status": "placed"})
+            if len(chunk) >= 50000:
+                db.execute(insert(Bid), chunk)
+                chunk = []
+    if chunk:
+        db.execute(insert(Bid), chunk)
+    db.commit()
+    return engine, db, match_ids, team_ids
+
+
+def run(sizes: list[int], match_count: int, legacy_max: int) -> list[dict]:
+    results = []
+    for size in sizes:
+        row = {"bids": size, "matches": match_count}
+        variants = [("set_based", None)]
+        if size <= legacy_max:
+            variants.append(("legacy", _legacy_settle))
+        for name, legacy_fn in variants:
+            # A 1M-bid database is hundreds of MB: delete it before seeding the next one
+            with tempfile.TemporaryDirectory() as directory:
+                engine, db, match_ids, team_ids = _seed(directory, size, match_count)
+                try:
+                    # match_service reads through the process-wide catalogue; point it at this database
+                    catalogue.invalidate()
+                    catalogue.snapshot(db)
+                    winners = {m: team_ids[(m - 1) % len(team_ids)] for m in match_ids}
+                    with QueryCounter(engine) as qc, timed() as t:
+                        if legacy_fn:
+                            for m, w in winners.items():
+                                legacy_fn(db, m, w, "league")
+                        else:
+                            settle_matches(db, winners)
+                    check = db.query(User.wins).order_by(User.id).limit(1).scalar()
+                    assert check is not None
+                    row[f"{name}_s"] = round(t["seconds"], 3)
+                    row[f"{name}_queries"] = qc.count
+                finally:
+                    db.close()
+                    engine.dispose()
+        results.append(row)
+    catalogue.invalidate()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated total bid counts")
+    parser.add_argument("--matches", type=int, default=10, help="Matches settled per call")
+    parser.add_argument("--legacy-max", type=int, default=10000, help="Largest size to also run the legacy loop on")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    print(f"{'bids':>8} {'set s':>8} {'set q':>6} {'legacy s':>9} {'legacy q':>9}")
+    for r in run(sizes, args.matches, args.legacy_max):
+        print(f"{r['bids']:>8} {r['set_based_s']:>8} {r['set_based_queries']:>6} "
+              f"{r.get('legacy_s', '-'):>9} {r.get('legacy_queries', '-'):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Per-stage bid usage: statements issued as a user's bid history grows.
+
+Compares the old per-bid lookup (one SELECT on matches per bid) with
+bid_service.get_stage_usage (one grouped join).
+
+    python -m benchmarks.bench_stage_usage [--sizes 10,30,100,1000]
+"""
+import argparse
+
+from app.bid_service import get_stage_usage
+from app.models import Bid, Match
+from benchmarks._common import QueryCounter, make_engine, seed_matches, seed_teams, seed_users, timed
+
+
+def _legacy_usage(db, user_id: int) -> dict[str, int]:
+    """The pre-aggregate implementation: load all bids, look each match up separately."""
+    bids = db.query(Bid).filter(Bid.user_id == user_id).all()
+    usage = {"league": 0, "semi": 0, "final": 0}
+    for b in bids:
+        m = db.query(Match).filter(Match.id == b.match_id).first()
+        if m:
+            usage[m.match_type] += 1
+    return usage
+
+
+def run(sizes: list[int]) -> list[dict]:
+    engine, Session = make_engine()
+    db = Session()
+    team_ids = seed_teams(db)
+    match_ids = seed_matches(db, max(sizes), team_ids)
+    results = []
+    for size in sizes:
+        (user_id,) = seed_users(db, 1)
+        db.bulk_insert_mappings(
+            Bid,
+            [{"user_id": user_id, "match_id": m, "selected_team_id": team_ids[0], "bid_status": "placed"}
+             for m in match_ids[:size]],
+        )
+        db.commit()
+        row = {"bids": size}
+        for name, fn in (("legacy", _legacy_usage), ("grouped", get_stage_usage)):
+            db.expire_all()
+            with QueryCounter(engine) as qc, timed() as t:
+                usage = fn(db, user_id)
+            assert usage["league"] == size
+            row[f"{name}_queries"] = qc.count
+            row[f"{name}_ms"] = round(t["seconds"] * 1000, 2)
+        results.append(row)
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,30,100,1000", help="Comma-separated bid history sizes")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    print(f"{'bids':>6} {'legacy q':>9} {'legacy ms':>10} {'grouped q':>10} {'grouped ms':>11}")
+    for r in run(sizes):
+        print(f"{r['bids']:>6} {r['legacy_queries']:>9} {r['legacy_ms']:>10} {r['grouped_queries']:>10} {r['grouped_ms']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""EXPLAIN-based regression check: the hot bid/match queries must use their indexes, not table scans.
+
+Runs against a fresh SQLite database by default, or --url (PostgreSQL runs with enable_seqscan off,
+since its planner prefers sequential scans on tiny tables). Exits 1 if any plan regresses.
+
+    python -m benchmarks.check_query_plans [--url postgresql://...]
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from sqlalchemy import func, text
+
+from app.models import Bid, Match
+from benchmarks._common import make_engine
+
+# (name, query builder, index the plan must mention)
+CHECKS = [
+    ("place_bid existing bid", lambda db: db.query(Bid).filter(Bid.user_id == 1, Bid.match_id == 2), "uq_bids_user_match"),
+    (
+        "my_bids keyset page",
+        lambda db: db.query(Bid)
+        .filter(Bid.user_id == 1, Bid.created_at < datetime(2026, 1, 1))
+        .order_by(Bid.created_at.desc(), Bid.id.desc()).limit(51),
+        "ix_bids_user_created_id",
+    ),
+    ("bid breakdown", lambda db: db.query(Bid).filter(Bid.match_id == 2), "ix_bids_match_team"),
+    (
+        "settlement team counts",
+        lambda db: db.query(Bid.selected_team_id, func.count(Bid.id))
+        .filter(Bid.match_id.in_([1, 2]), Bid.selected_team_id.isnot(None))
+        .group_by(Bid.selected_team_id),
+        "ix_bids_match_team",
+    ),
+    (
+        "stage usage join",
+        lambda db: db.query(Match.match_type, func.count(Bid.id))
+        .join(Match, Match.id == Bid.match_id).filter(Bid.user_id == 1).group_by(Match.match_type),
+        "uq_bids_user_match",
+    ),
+    (
+        "matches by series",
+        lambda db: db.query(Match).filter(Match.series == "ipl").order_by(Match.match_date, Match.match_time),
+        "ix_matches_series_date_time",
+    ),
+]
+
+
+def explain(db, query) -> str:
+    sql = str(query.statement.compile(db.bind, compile_kwargs={"literal_binds": True}))
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text("SET enable_seqscan = off"))
+        rows = db.execute(text("EXPLAIN " + sql)).all()
+        return "\n".join(r[0] for r in rows)
+    rows = db.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+    return "\n".join(str(r[-1]) for r in rows)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite://", help="Database URL (default: in-memory SQLite)")
+    args = parser.parse_args()
+    _, Session = make_engine(args.url)
+    db = Session()
+    failures = 0
+    for name, build, index in CHECKS:
+        plan = explain(db, build(db))
+        ok = index in plan
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: expected {index}")
+        if not ok:
+            print("     " + plan.replace("\n", "\n     "))
+    db.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""End-to-end API benchmark: seeds a synthetic dataset and drives the app in-process over ASGI.
+
+Seeds --users users, --matches upcoming league matches and --bids bids into a throwaway SQLite
+database (or DATABASE_URL with --database-url), then runs each scenario for --requests requests at
+--concurrency concurrent clients through httpx's ASGI transport (no network, no server process):
+
+    list_matches    GET  /matches/?series=ipl
+    leaderboard     GET  /users/leaderboard
+    bid_breakdown   GET  /matches/{id}/bid-breakdown
+    bid_summary     GET  /matches/{id}/bid-breakdown/summary
+    place_bid       POST /bids/                      (random user, open match, team)
+    settlement      POST /users/admin/match-results/{id}/confirm   (one request per match, timed until
+                                                                    its settlement job is done)
+
+Reports throughput, p50/p95/p99 latency and SQL statements per request, and writes them as JSON
+(default benchmarks/results/<commit>-<time>.json). --compare OLD.json prints the change per metric.
+
+    python -m benchmarks.harness [--users 500] [--matches 60] [--bids 5000] [--requests 300]
+                                 [--concurrency 8] [--scenarios list_matches,place_bid] [--compare OLD.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCENARIOS = ("list_matches", "leaderboard", "bid_breakdown", "bid_summary", "place_bid", "settlement")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def _seed(session_factory, args) -> dict:
+    """Users (the first is the admin), future league matches and random bids. Returns ids for the scenarios."""
+    from sqlalchemy import insert
+
+    from app.models import Bid, User
+    from benchmarks._common import seed_matches, seed_teams, seed_users
+
+    rng = random.Random(args.seed)
+    db = session_factory()
+    try:
+        team_ids = seed_teams(db)
+        user_ids = seed_users(db, args.users, prefix="bench")
+        admin_id = user_ids[0]
+        db.query(User).filter(User.id == admin_id).update({User.username: "admin"})
+        match_ids = seed_matches(db, args.matches, team_ids, series="ipl", year=2099)
+        teams = {m: (team_ids[i % len(team_ids)], team_ids[(i + 1) % len(team_ids)]) for i, m in enumerate(match_ids)}
+        # Bids on the first half of the matches; the second half stays open for place_bid/settlement
+        bid_matches = match_ids[: max(1, len(match_ids) // 2)]
+        pairs = rng.sample(range(len(user_ids[1:]) * len(bid_matches)), min(args.bids, len(user_ids[1:]) * len(bid_matches)))
+        rows, per_user = [], {}
+        for p in pairs:
+            user_id, match_id = user_ids[1:][p // len(bid_matches)], bid_matches[p % len(bid_matches)]
+            rows.append({"user_id": user_id, "match_id": match_id, "selected_team_id": rng.choice(teams[match_id]),
+                         "bid_status": "placed"})
+            per_user[user_id] = per_user.get(user_id, 0) + 1
+        if rows:
+            db.execute(insert(Bid), rows)
+        for user_id, n in per_user.items():
+            db.query(User).filter(User.id == user_id).update({User.total_bids: n})
+        db.commit()
+    finally:
+        db.close()
+    return {
+        "admin_id": admin_id,
+        "user_ids": user_ids[1:],
+        "bid_matches": bid_matches,
+        "open_matches": match_ids[len(bid_matches):],
+        "teams": teams,
+    }
+
+
+async def _run_scenario(client, engine, name: str, requests: list, concurrency: int, after=None) -> dict:
+    """requests: [(method, url, headers, json)]. Runs them with `concurrency` in flight.
+    after(resp), if given, is awaited for each successful response and timed as part of the request."""
+    from benchmarks._common import QueryCounter
+
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    queue = list(reversed(requests))
+
+    async def worker():
+        while queue:
+            method, url, headers, body = queue.pop()
+            start = time.perf_counter()
+            resp = await client.request(method, url, headers=headers, json=body)
+            if after is not None and resp.status_code < 400:
+                await after(resp)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                key = str(resp.status_code)
+                errors[key] = errors.get(key, 0) + 1
+
+    with QueryCounter(engine) as counter:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "requests": n,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(n / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / n * 1000, 3) if n else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "sql_per_request": round(counter.count / n, 2) if n else 0.0,
+    }
+
+
+def _settlement_runner():
+    """ASGITransport doesn't run the lifespan, so no settlement worker thread is started. Run the queued
+    jobs in-band after each confirm instead, one run at a time like the single worker, so a settlement
+    request is timed until its job is done rather than just queued."""
+    from app.settlement_jobs import settlement_worker
+
+    lock = asyncio.Lock()
+
+    async def run(resp):
+        async with lock:
+            await asyncio.to_thread(settlement_worker.run_pending)
+
+    return run
+
+
+def _unfinished_jobs(session_factory) -> dict[str, int]:
+    """{"job_<status>": count} for settlement jobs that did not end "done"."""
+    from sqlalchemy import func
+
+    from app.models import SettlementJob
+
+    db = session_factory()
+    try:
+        rows = (
+            db.query(SettlementJob.status, func.count(SettlementJob.id))
+            .filter(SettlementJob.status != "done")
+            .group_by(SettlementJob.status)
+            .all()
+        )
+    finally:
+        db.close()
+    return {f"job_{status}": n for status, n in rows}
+
+
+def _build_requests(name: str, data: dict, tokens: dict, args, rng: random.Random) -> list:
+    auth = lambda user_id: {"Authorization": f"Bearer {tokens[user_id]}"}  # noqa: E731
+    users, n = data["user_ids"], args.requests
+    if name == "list_matches":
+        return [("GET", "/matches/?series=ipl", None, None)] * n
+    if name == "leaderboard":
+        return [("GET", "/users/leaderboard", auth(rng.choice(users)), None) for _ in range(n)]
+    if name == "bid_breakdown":
+        return [("GET", f"/matches/{rng.choice(data['bid_matches'])}/bid-breakdown", auth(rng.choice(users)), None)
+                for _ in range(n)]
+    if name == "bid_summary":
+        return [("GET", f"/matches/{rng.choice(data['bid_matches'])}/bid-breakdown/summary", auth(rng.choice(users)), None)
+                for _ in range(n)]
+    if name == "place_bid":
+        out = []
+        for _ in range(n):
+            match_id = rng.choice(data["open_matches"])
+            out.append(("POST", "/bids/", auth(rng.choice(users)),
+                        {"match_id": match_id, "selected_team_id": rng.choice(data["teams"][match_id])}))
+        return out
+    if name == "settlement":  # each match can only be settled once
+        return [("POST", f"/users/admin/match-results/{m}/confirm", auth(data["admin_id"]),
+                 {"winner_team_id": rng.choice(data["teams"][m])}) for m in data["bid_matches"]]
+    raise ValueError(name)
+
+
+async def _run(args, scenarios: list[str]) -> dict:
+    import httpx
+
+    from app.auth import create_access_token
+    from app.database import SessionLocal, engine
+    from app.main import app
+
+    data = _seed(SessionLocal, args)
+    tokens = {u: create_access_token({"sub": str(u)}) for u in data["user_ids"] + [data["admin_id"]]}
+    rng = random.Random(args.seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in scenarios:
+            reqs = _build_requests(name, data, tokens, args, rng)
+            # Warm caches/connections outside the measurement (not for settlement: it is one-shot)
+            if name not in ("settlement", "place_bid"):
+                for method, url, headers, body in reqs[: min(5, len(reqs))]:
+                    await client.request(method, url, headers=headers, json=body)
+            after = _settlement_runner() if name == "settlement" else None
+            results[name] = await _run_scenario(client, engine, name, reqs, args.concurrency, after)
+            if name == "settlement":
+                results[name]["errors"].update(_unfinished_jobs(SessionLocal))
+            print(f"{name:14s} {_format(results[name])}", flush=True)
+    return results
+
+
+def _format(r: dict) -> str:
+    errors = f"  errors={r['errors']}" if r["errors"] else ""
+    return (f"{r['requests']:6d} req  {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:8.2f}ms  "
+            f"p95 {r['p95_ms']:8.2f}ms  p99 {r['p99_ms']:8.2f}ms  {r['sql_per_request']:6.2f} SQL/req{errors}")
+
+
+def _compare(old: dict, new: dict) -> None:
+    print(f"\nvs {old['meta'].get('commit') or '?'} ({old['meta'].get('timestamp', '?')}):")
+    for name, cur in new["scenarios"].items():
+        prev = old.get("scenarios", {}).get(name)
+        if not prev:
+            continue
+        parts = []
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "sql_per_request"):
+            if prev.get(metric):
+                parts.append(f"{metric} {(cur[metric] - prev[metric]) / prev[metric] * 100:+.1f}%")
+        print(f"  {name:14s} " + "  ".join(parts))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="In-process API benchmark for the bidding server.")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--matches", type=int, default=60)
+    parser.add_argument("--bids", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario (settlement: one per bid match)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="benchmark against this (empty) database instead of a temp SQLite file")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.users < 2 or args.matches < 2:
+        parser.error("need at least 2 users and 2 matches")
+
+    # Configure the app before it is imported: its engine and settings are read at import time
+    tmp = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}/bench.db"
+    os.environ["ADMIN_USERNAMES"] = "admin"
+
+    started = datetime.now(timezone.utc)
+    try:
+        scenario_results = asyncio.run(_run(args, scenarios))
+    finally:
+        if tmp is not None:
+            from app.database import engine
+            engine.dispose()
+            tmp.cleanup()
+
+    from app.config import settings
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": started.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": "postgresql" if "postgresql" in os.environ["DATABASE_URL"] else "sqlite",
+            "async_db": settings.ASYNC_DB_ENABLED,
+            "params": {k: getattr(args, k) for k in ("users", "matches", "bids", "requests", "concurrency", "seed")},
+        },
+        "scenarios": scenario_results,
+    }
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{report['meta']['commit'] or 'nogit'}-{started.strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nwrote {output}")
+    if args.compare:
+        _compare(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Bulk import teams, matches or users from a CSV (with header row) or NDJSON file.
+
+  python import_data.py teams teams.csv
+  python import_data.py matches ipl_2026.csv
+  python import_data.py users players.ndjson --format ndjson --chunk-size 200
+  python import_data.py matches fixtures.csv --local   # SQLite instead of DATABASE_URL
+
+Matches reference teams by short_name (team1, team2). Existing rows are updated (teams by short_name,
+users by username, matches by id or by series/date/time/teams). Restart or POST /users/admin/matches/reload
+afterwards so running servers pick up new fixtures before their catalogue TTL expires.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Support --local to use SQLite (must run BEFORE importing app.database)
+if "--local" in sys.argv:
+    os.environ["DATABASE_URL"] = ""
+
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.importer import FORMATS, KINDS, import_lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import teams, matches or users.")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path", help="CSV/NDJSON file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="defaults from the file extension (csv unless .ndjson/.jsonl)")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--local", action="store_true", help="use local SQLite")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.path == "-":
+            importer = import_lines(db, args.kind, fmt, sys.stdin, args.chunk_size)
+        else:
+            with open(args.path, encoding="utf-8-sig", newline="") as f:
+                importer = import_lines(db, args.kind, fmt, f, args.chunk_size)
+    finally:
+        db.close()
+    report = importer.report
+    for error in report.errors:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    print(json.dumps({k: v for k, v in report.as_dict().items() if k != "errors"}))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,8 +18,9 @@ db = SessionLocal()
 
 # Leaderboard players (default password: bid123, unique mobile per user)
 LEADERBOARD_USERS = ["pavi", "simbu", "sax", "ks", "nimie", "nikhil", "ranjith"]
+existing_users = {u for (u,) in db.query(User.username).filter(User.username.in_(LEADERBOARD_USERS))}
 for i, uname in enumerate(LEADERBOARD_USERS):
-    if not db.query(User).filter(User.username == uname).first():
+    if uname not in existing_users:
         mobile = f"98765432{10 + i:02d}"  # 9876543210, 9876543211, ...
         db.add(User(username=uname, hashed_password=get_password_hash("bid123"), mobile_number=mobile))
 db.commit()
@@ -29,8 +30,9 @@ from app.match_data import TEAMS_DATA as MD_TEAMS
 
 TEAMS_DATA = [{"id": t[0], "name": t[1], "short_name": t[2]} for t in MD_TEAMS]
 
+existing_teams = {s for (s,) in db.query(Team.short_name)}
 for t in TEAMS_DATA:
-    if not db.query(Team).filter(Team.short_name == t["short_name"]).first():
+    if t["short_name"] not in existing_teams:
         db.add(Team(**t))
 
 db.commit()